@@ -2,8 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 from app.services.ai_service import AIService
-from sqlmodel import Session
-from app.core.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_async_session
 from app.services.assignment_service import AssignmentService
 from app.models.models import Issue, Client
 
@@ -22,9 +22,70 @@ class ChatResponse(BaseModel):
     escalation: Optional[Dict[str, Any]] = None
 
 from app.services.email_service import EmailService
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import json
+
+async def _handle_escalation(ai_response: Dict[str, Any], session: AsyncSession) -> Dict[str, Any]:
+    """Creates + assigns the Issue and notifies the assignee for escalations; adds 'escalation' metadata."""
+    # 2. If Escalate, Save to DB
+    if ai_response["action"] == "escalate":
+        report = ai_response["report"]
+        
+        # Find best employee (sync service run on the async session's connection)
+        assigned_emp = await session.run_sync(
+            AssignmentService.assign_employee,
+            report["department"], 
+            report["priority"]
+        )
+        
+        # Create Issue Record
+        new_issue = Issue(
+            description=report["summary"],
+            department=report["department"],
+            priority=report["priority"],
+            status="open",
+            ai_summary=str(report["extracted_info"]),
+            assigned_to=assigned_emp.id if assigned_emp else None,
+            client_id=None # Connect to real client if exists
+        )
+        session.add(new_issue)
+        await session.commit()
+        
+        # 3. NOTIFY via Email (If High Priority)
+        # 3. NOTIFY via Email (For ALL escalations during demo)
+        print(f"DEBUG: Checking email logic. Priority: {report['priority']}, Assigned: {assigned_emp}")
+        if assigned_emp:
+            email_body = EmailService.generate_html_report(report)
+            # Resend's client is blocking -> run it in a worker thread
+            await asyncio.to_thread(
+                EmailService.send_notification,
+                to_email=assigned_emp.email,
+                subject=f"📢 New Issue: {report['department']} - Priority: {report['priority'].upper()}",
+                content=email_body
+            )
+            ai_response["text"] += f"\n\n(Notification: Email sent to {assigned_emp.name})"
+        
+        # Add escalation metadata for testing/frontend
+        ai_response["escalation"] = {
+            "department": report["department"],
+            "priority": report["priority"],
+            "escalated": True
+        }
+        
+        # Append assignment info to response (for demo purpose)
+        if assigned_emp:
+            ai_response["text"] += f"\n\n(Internal: Assigned to {assigned_emp.name} in {assigned_emp.department})"
+    else:
+        ai_response["escalation"] = {
+            "escalated": False
+        }
+
+    return ai_response
 
 @router.post("/", response_model=ChatResponse)
-async def chat_interaction(request: ChatRequest, session: Session = Depends(get_session)):
+async def chat_interaction(request: ChatRequest, session: AsyncSession = Depends(get_async_session)):
     """
     User talks to AI.
     - Scans Knowledge Base.
@@ -33,60 +94,65 @@ async def chat_interaction(request: ChatRequest, session: Session = Depends(get_
     """
     try:
         # 1. AI Analysis
-        ai_response = AIService.process_message(request.message, request.session_id, session)
-        
-        # 2. If Escalate, Save to DB
-        if ai_response["action"] == "escalate":
-            report = ai_response["report"]
-            
-            # Find best employee
-            assigned_emp = AssignmentService.assign_employee(
-                session, 
-                report["department"], 
-                report["priority"]
-            )
-            
-            # Create Issue Record
-            new_issue = Issue(
-                description=report["summary"],
-                department=report["department"],
-                priority=report["priority"],
-                status="open",
-                ai_summary=str(report["extracted_info"]),
-                assigned_to=assigned_emp.id if assigned_emp else None,
-                client_id=None # Connect to real client if exists
-            )
-            session.add(new_issue)
-            session.commit()
-            
-            # 3. NOTIFY via Email (If High Priority)
-            # 3. NOTIFY via Email (For ALL escalations during demo)
-            print(f"DEBUG: Checking email logic. Priority: {report['priority']}, Assigned: {assigned_emp}")
-            if assigned_emp:
-                email_body = EmailService.generate_html_report(report)
-                EmailService.send_notification(
-                    to_email=assigned_emp.email,
-                    subject=f"📢 New Issue: {report['department']} - Priority: {report['priority'].upper()}",
-                    content=email_body
-                )
-                ai_response["text"] += f"\n\n(Notification: Email sent to {assigned_emp.name})"
-            
-            # Add escalation metadata for testing/frontend
-            ai_response["escalation"] = {
-                "department": report["department"],
-                "priority": report["priority"],
-                "escalated": True
-            }
-            
-            # Append assignment info to response (for demo purpose)
-            if assigned_emp:
-                ai_response["text"] += f"\n\n(Internal: Assigned to {assigned_emp.name} in {assigned_emp.department})"
-        else:
-            ai_response["escalation"] = {
-                "escalated": False
-            }
+        ai_response = await AIService.process_message(request.message, request.session_id, session)
         
-        return ai_response
+        return await _handle_escalation(ai_response, session)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Replies whose client went away are still finished (and saved); keep their tasks referenced
+_stream_tasks = set()
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same as POST /api/chat/ as Server-Sent Events, so the reply shows up while it is generated:
+    - `token` events ({"text": ...}) carry the reply text as the LLM streams it
+      (replies that skip the LLM stream, e.g. KB fast-path answers, arrive as one token event),
+    - a `reset` event ({}) if the LLM stream broke off and the reply came from a fallback:
+      the client discards the tokens so far, the final reply follows as new token events,
+    - a closing `done` event carries the full POST /api/chat/ response (its text is final),
+    - or an `error` event ({"detail": ...}).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    streamed = []
+
+    async def on_token(text: str):
+        streamed.append(text)
+        await queue.put(_sse("token", {"text": text}))
+
+    async def respond():
+        try:
+            # Own session: the request-scoped dependency would not outlive a client disconnect
+            async with asynccontextmanager(get_async_session)() as session:
+                ai_response = await AIService.process_message(
+                    request.message, request.session_id, session, on_token=on_token
+                )
+                if streamed and "".join(streamed) != ai_response["text"]:
+                    await queue.put(_sse("reset", {}))
+                    streamed.clear()
+                if not streamed:
+                    await on_token(ai_response["text"])
+                await _handle_escalation(ai_response, session)
+            await queue.put(_sse("done", ChatResponse(**ai_response).model_dump()))
+        except Exception as e:
+            await queue.put(_sse("error", {"detail": str(e)}))
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(respond())
+    _stream_tasks.add(task)
+    task.add_done_callback(_stream_tasks.discard)
+
+    async def events():
+        while (event := await queue.get()) is not None:
+            yield event
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
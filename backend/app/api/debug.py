@@ -38,6 +38,36 @@ def get_all_employees(session: Session = Depends(get_session)):
     employees = session.exec(select(Employee)).all()
     return employees
 
+@router.get("/vector-cache")
+def get_vector_cache_stats():
+    """Debug: Query-embedding cache hit/miss counters and estimated encode time saved."""
+    from app.services.vector_service import VectorService
+    return VectorService.query_cache_stats()
+
+@router.get("/vector-batching")
+def get_vector_batching_stats():
+    """Debug: Embedding micro-batcher batch sizes and queueing delay."""
+    from app.services.vector_service import VectorService
+    return VectorService.batching_stats()
+
+@router.get("/answer-cache")
+def get_answer_cache_stats():
+    """Debug: Semantic answer cache hit rate, size, evictions and KB invalidations."""
+    from app.services.ai_service import AIService
+    return AIService.answer_cache_stats()
+
+@router.get("/llm")
+def get_llm_stats():
+    """Debug: Groq call / retry / failure counters and client pool settings."""
+    from app.services.llm_service import LLMService
+    return LLMService.stats()
+
+@router.post("/reload-kb")
+def reload_knowledge_base():
+    """Admin: Re-read knowledge_base.json, re-embedding only added/changed entries."""
+    from app.services.vector_service import VectorService
+    return VectorService.reload_kb()
+
 @router.get("/send-test-email")
 def send_test_email():
     """
@@ -1,4 +1,6 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
 import os
 
 # Use absolute path to avoid "unable to open database file" errors
@@ -11,9 +13,17 @@ sqlite_url = f"sqlite:///{DB_PATH}"
 connect_args = {"check_same_thread": False}
 engine = create_engine(sqlite_url, echo=True, connect_args=connect_args)
 
+# Async engine (aiosqlite) for the chat path, so DB commits don't block the event loop
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}", echo=True)
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    # expire_on_commit=False: objects stay readable after commit without a (blocking) lazy refresh
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -37,3 +37,11 @@ class ChatMessage(SQLModel, table=True):
     role: str # 'user' or 'assistant'
     content: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ChatSummary(SQLModel, table=True):
+    """Rolling summary of a session's older ChatMessages (those with id <= summarized_until)."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: str = Field(index=True, unique=True)
+    summary: str
+    summarized_until: int = 0  # id of the last ChatMessage folded into the summary
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
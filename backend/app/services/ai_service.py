@@ -1,20 +1,34 @@
-from typing import Dict, Any
-from sqlmodel import Session
+from typing import Dict, Any, Callable, Awaitable
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .vector_service import VectorService
 from .dummy_rag import MockRAG
 from .llm_service import LLMService
+from .answer_cache import SemanticAnswerCache, ANSWER_CACHE_ENABLED
+from .history_service import HistoryService
 
 class AIService:
     """
     The Brain of the backend.
     """
 
+    # Number of KB matches passed to the LLM as context
+    RAG_CONTEXT_K = 3
+    # Hybrid score above which the top KB answer is returned directly (no LLM call)
+    FAST_PATH_THRESHOLD = 0.88
+    # Without the LLM (Groq failing / circuit open), KB matches above this score are answered as-is
+    LOCAL_ANSWER_THRESHOLD = 0.5
+
+    # LLM answers to first-turn questions, reused for near-duplicate questions (ANSWER_CACHE_*)
+    _answer_cache = SemanticAnswerCache()
+
     @classmethod
-    def process_message(cls, message: str, session_id: str, db_session: Session) -> Dict[str, Any]:
+    async def process_message(cls, message: str, session_id: str, db_session: AsyncSession,
+                              on_token: Callable[[str], Awaitable[None]] | None = None) -> Dict[str, Any]:
         """
         1. Save User Message to History
         2. Check for explicit "Escalate" intent or RAG match.
         3. If no simple answer, use LLM to decide: Follow-up OR Escalate.
+        With `on_token`, the LLM reply text is streamed to it while it is generated.
         """
         from app.models.models import ChatMessage
         import json
@@ -22,13 +36,10 @@ class AIService:
         # 1. Save User Message
         user_msg = ChatMessage(session_id=session_id, role="user", content=message)
         db_session.add(user_msg)
-        db_session.commit()
+        await db_session.commit()
 
-        # 2. Get History
-        from sqlmodel import select
-        statement = select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at)
-        history_objs = db_session.exec(statement).all()
-        history = [{"role": m.role, "content": m.content} for m in history_objs]
+        # 2. Get History (messages not yet summarized + summary of older ones; no LLM call yet)
+        history, summary = await HistoryService.load(session_id, db_session, summarize=False)
 
         message_lower = message.lower()
         
@@ -36,25 +47,56 @@ class AIService:
         force_escalate = any(w in message_lower for w in ["human", "agent", "didn't work", "not helpful", "escalate", "speak to", "مدير", "بني آدم"])
         
         # 1. Semantic Search (RAG) - Get context even if score is medium
-        vector_result = VectorService.search(message, threshold=0.1) # Aggressive search for context
+        # Top-k matches come from the same single encode, so the LLM gets richer context for free
+        matches = (await VectorService.asearch_many([message], k=cls.RAG_CONTEXT_K, threshold=0.1))[0] # Aggressive search for context
+        vector_result = matches[0] if matches else None
         rag_context = None
         if vector_result:
-            rag_context = f"Topic: {vector_result['doc'].get('category')}\nContent: {vector_result['doc']['text']}"
+            rag_context = "\n\n".join(
+                f"Topic: {m['doc'].get('category')}\nContent: {m['doc']['text']}" for m in matches
+            )
             
             # Fast Path: If VERY high confidence, answer directly
-            if not force_escalate and vector_result["score"] > 0.88:
+            if not force_escalate and vector_result["score"] > cls.FAST_PATH_THRESHOLD:
                 answer_text = vector_result["doc"]["text"]
                 ai_msg = ChatMessage(session_id=session_id, role="assistant", content=answer_text)
                 db_session.add(ai_msg)
-                db_session.commit()
+                await db_session.commit()
                 return {"action": "reply", "text": answer_text, "source": "vector_db"}
 
+        # Semantic answer cache: a first-turn question (no earlier context that could change
+        # the answer) that paraphrases an already answered one reuses that LLM answer
+        cacheable = ANSWER_CACHE_ENABLED and not force_escalate and len(history) == 1 and summary is None
+        if cacheable:
+            query_vec = (await VectorService.aembed_queries([message]))[0]  # query-cache hit
+            kb_version = VectorService.kb_version()
+            cached, similarity = cls._answer_cache.lookup(query_vec, kb_version)
+            if cached is not None:
+                print(f"💾 Answer cache hit (similarity {similarity:.3f})")
+                ai_msg = ChatMessage(session_id=session_id, role="assistant", content=cached["text"])
+                db_session.add(ai_msg)
+                await db_session.commit()
+                return {"action": "reply", "text": cached["text"], "source": "answer_cache"}
+
+        # Fold older turns into the summary only now, so fast-path and cached answers never pay for it
+        if HistoryService.over_budget(history, summary):
+            history, summary = await HistoryService.load(session_id, db_session)
+
         # 2. Multi-turn Brain: Decide next step (Now with Knowledge Base!)
-        decision = LLMService.decide_next_step(history, rag_context=rag_context)
+        if on_token is not None and not force_escalate:
+            decision = await LLMService.stream_next_step(history, on_token, rag_context=rag_context, summary=summary)
+        else:
+            decision = await LLMService.decide_next_step(history, rag_context=rag_context, summary=summary)
+
+        if decision.get("fallback"):
+            decision = cls._local_decision(message, matches)
+
+        if cacheable and decision.get("action") == "answer" and decision.get("text") and not decision.get("fallback"):
+            cls._answer_cache.store(query_vec, {"text": decision["text"]}, kb_version)
         
         if decision["action"] == "escalate" or force_escalate:
-            # Full classification for the final report
-            classification = LLMService.classify_message(message)
+            # Full classification for the final report (already in the decision in combined mode)
+            classification = decision.get("classification") or await LLMService.classify_message(message)
             
             escalation_text = decision.get("text", "I am forwarding your request to our team.")
             if force_escalate:
@@ -63,7 +105,7 @@ class AIService:
             # Save AI Response
             ai_msg = ChatMessage(session_id=session_id, role="assistant", content=escalation_text)
             db_session.add(ai_msg)
-            db_session.commit()
+            await db_session.commit()
 
             return {
                 "action": "escalate",
@@ -81,13 +123,46 @@ class AIService:
         reply_text = decision["text"]
         ai_msg = ChatMessage(session_id=session_id, role="assistant", content=reply_text)
         db_session.add(ai_msg)
-        db_session.commit()
+        await db_session.commit()
 
-        return {
+        result = {
             "action": "reply",
             "text": reply_text
         }
+        if decision.get("source"):
+            result["source"] = decision["source"]
+        return result
+
+    @classmethod
+    def _local_decision(cls, message: str, matches) -> Dict[str, Any]:
+        """
+        Decision without the LLM: the top KB match if it is close enough, else the MockRAG
+        keyword matcher, else escalation with rule-based department/priority for anything
+        that looks like a real issue. Everything else gets the generic fallback reply.
+        """
+        if matches and matches[0]["score"] >= cls.LOCAL_ANSWER_THRESHOLD:
+            return {"action": "answer", "text": matches[0]["doc"]["text"], "source": "kb_fallback", "fallback": True}
+
+        keyword_match = MockRAG.search(message)
+        if keyword_match:
+            return {"action": "answer", "text": keyword_match["solution"], "source": "keyword_fallback",
+                    "fallback": True}
+
+        rules = cls._mock_llm_classification(message)
+        if rules["department"] != "general" or rules["priority"] == "high":
+            return {
+                "action": "escalate",
+                "text": "I'm forwarding your request to our team so a specialist can follow up with you.",
+                "classification": LLMService.local_classification(message, "LLM unavailable"),
+                "fallback": True,
+            }
+        return LLMService._decide_fallback()
     
+    @classmethod
+    def answer_cache_stats(cls) -> Dict[str, Any]:
+        """Hit rate, size and eviction/invalidation counters of the semantic answer cache."""
+        return cls._answer_cache.stats()
+
     @staticmethod
     def _mock_llm_classification(text: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,140 @@
+from typing import Tuple
+import numpy as np
+import os
+from .quantization import QuantizedVectors
+
+# Backend selection for VectorService:
+# - 'exact': brute-force matrix product over every KB vector (best for small KBs)
+# - 'ivf':   inverted-file index (k-means partitions, only nprobe partitions scanned per query)
+# - 'auto':  'ivf' once the KB reaches ANN_MIN_DOCS vectors, 'exact' below that
+ANN_BACKEND = os.getenv("VECTOR_ANN_BACKEND", "auto")
+ANN_MIN_DOCS = int(os.getenv("VECTOR_ANN_MIN_DOCS", "20000"))
+
+# Recall / latency knobs (0 = derive from KB size)
+IVF_NLIST = int(os.getenv("VECTOR_IVF_NLIST", "0"))
+IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "16"))
+
+
+class ExactIndex:
+    """
+    Brute-force inner-product index over L2-normalized vectors (any VECTOR_STORAGE mode;
+    a plain float32 matrix is wrapped without a copy). Recall is always 1.0; cost is linear
+    in the KB size.
+    """
+
+    name = "exact"
+
+    def __init__(self, vectors: np.ndarray | QuantizedVectors):
+        self.vectors = vectors if isinstance(vectors, QuantizedVectors) else QuantizedVectors(vectors, "float32")
+
+    def search(self, query_vecs: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (ids, scores) of shape (len(query_vecs), k), best first."""
+        scores = self.vectors.scores(query_vecs)
+        k = min(k, scores.shape[1])
+        ids = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        return _sort_rows(ids, np.take_along_axis(scores, ids, axis=1))
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index over L2-normalized vectors.
+
+    Vectors are partitioned into `nlist` cells by spherical k-means. A query only scans the
+    `nprobe` cells whose centroids are closest to it, so cost is roughly nprobe / nlist of an
+    exact scan. Raise nprobe for recall, lower it for latency.
+    """
+
+    name = "ivf"
+
+    def __init__(self, vectors: np.ndarray, nlist: int = 0, nprobe: int = IVF_NPROBE,
+                 train_size: int = 50000, iterations: int = 10, seed: int = 42):
+        self.vectors = vectors
+        n_vectors = vectors.shape[0]
+        self.nlist = max(1, min(nlist or int(4 * np.sqrt(n_vectors)), n_vectors))
+        self.nprobe = max(1, min(nprobe, self.nlist))
+
+        rng = np.random.default_rng(seed)
+        self.centroids = self._train(vectors, rng, train_size, iterations)
+
+        # Inverted lists in CSR layout: ids of cell c are list_ids[list_ptr[c]:list_ptr[c + 1]]
+        assignments = self._assign(vectors)
+        self.list_ids = np.argsort(assignments, kind='stable').astype(np.int64)
+        self.list_ptr = np.zeros(self.nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=self.nlist), out=self.list_ptr[1:])
+
+    def _train(self, vectors: np.ndarray, rng, train_size: int, iterations: int) -> np.ndarray:
+        """Spherical k-means on a sample of the vectors."""
+        n_vectors = vectors.shape[0]
+        sample = vectors[np.sort(rng.choice(n_vectors, size=min(train_size, n_vectors), replace=False))]
+        sample = np.asarray(sample, dtype=np.float32)
+        centroids = sample[rng.choice(sample.shape[0], size=self.nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=self.nlist)
+
+            # Re-seed empty cells with random sample points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()), replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        return centroids
+
+    def _assign(self, vectors: np.ndarray, batch_size: int = 16384) -> np.ndarray:
+        """Nearest centroid per vector, batched to bound the temporary score matrix."""
+        assignments = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], batch_size):
+            batch = np.asarray(vectors[start:start + batch_size], dtype=np.float32)
+            assignments[start:start + batch_size] = np.argmax(batch @ self.centroids.T, axis=1)
+        return assignments
+
+    def probe(self, query_vec: np.ndarray) -> np.ndarray:
+        """Candidate vector ids for one query: members of its nprobe closest cells."""
+        centroid_scores = self.centroids @ query_vec
+        if self.nprobe >= self.nlist:
+            cells = np.arange(self.nlist)
+        else:
+            cells = np.argpartition(-centroid_scores, self.nprobe - 1)[:self.nprobe]
+        return np.concatenate([self.list_ids[self.list_ptr[c]:self.list_ptr[c + 1]] for c in cells])
+
+    def search(self, query_vecs: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (ids, scores) of shape (len(query_vecs), k), best first. Missing slots are id -1."""
+        all_ids = np.full((query_vecs.shape[0], k), -1, dtype=np.int64)
+        all_scores = np.full((query_vecs.shape[0], k), -np.inf, dtype=np.float32)
+
+        for row, query_vec in enumerate(query_vecs):
+            candidates = self.probe(query_vec)
+            scores = self.vectors[candidates] @ query_vec
+            top = min(k, candidates.shape[0])
+            if top == 0:
+                continue
+            best = np.argpartition(-scores, top - 1)[:top]
+            ids, top_scores = _sort_rows(candidates[best][None, :], scores[best][None, :])
+            all_ids[row, :top] = ids[0]
+            all_scores[row, :top] = top_scores[0]
+
+        return all_ids, all_scores
+
+
+def _sort_rows(ids: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorts each row of (ids, scores) by descending score."""
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return np.take_along_axis(ids, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def build_index(vectors: np.ndarray | QuantizedVectors, backend: str = ANN_BACKEND):
+    """Builds the configured ANN backend, falling back to exact search for small KBs."""
+    if backend == "auto":
+        backend = "ivf" if vectors.shape[0] >= ANN_MIN_DOCS else "exact"
+
+    if backend == "ivf" and vectors.shape[0] > 0:
+        return IVFIndex(vectors, nlist=IVF_NLIST, nprobe=IVF_NPROBE)
+    if backend not in ("exact", "ivf"):
+        print(f"⚠️ Unknown VECTOR_ANN_BACKEND '{backend}'. Using exact search.")
+    return ExactIndex(vectors)
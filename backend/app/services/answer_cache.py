@@ -0,0 +1,119 @@
+from typing import Any, Dict, Hashable, Tuple
+import numpy as np
+import threading
+import os
+from .cache import LRUCache
+
+# Semantic answer cache for first-turn questions that reach the LLM
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity (between question embeddings) needed to reuse a cached answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+# Seconds a cached answer stays valid (0 = until evicted or the KB changes)
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+
+
+class SemanticAnswerCache:
+    """
+    LLM answers keyed by the (L2-normalized) embedding of the question they answered.
+    A lookup returns the answer of the most similar cached question if their cosine
+    similarity is >= threshold. Entries are evicted LRU + TTL through an LRUCache
+    (slot -> answer) whose slots index the rows of one vector matrix, and all of them
+    are dropped when the KB version they were generated against changes.
+    """
+
+    def __init__(self, max_size: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL,
+                 threshold: float = ANSWER_CACHE_THRESHOLD):
+        self.threshold = threshold
+        self._entries = LRUCache(max_size, ttl, on_evict=self._release)
+        # One spare row: a new entry always has a free slot before the LRU bound evicts another
+        self._capacity = max(max_size, 0) + 1
+        self._vectors: np.ndarray | None = None
+        self._used = np.zeros(self._capacity, dtype=bool)
+        self._free = list(range(self._capacity))
+        self._kb_version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def _release(self, slot: Hashable, answer: Any):
+        # Called by the LRUCache (inside our lock) for evicted / expired entries
+        self._used[slot] = False
+        self._free.append(slot)
+
+    def _reset(self):
+        self._entries.clear()
+        self._used[:] = False
+        self._free = list(range(self._capacity))
+
+    def _sync_version(self, kb_version: str | None):
+        """Drops every entry once the KB they were answered from has changed."""
+        if kb_version == self._kb_version:
+            return
+        if self._used.any():
+            self.invalidations += 1
+            print(f"♻️ Answer cache invalidated (KB changed), dropped {int(self._used.sum())} answers")
+        self._reset()
+        self._kb_version = kb_version
+
+    def lookup(self, vector: np.ndarray, kb_version: str | None = None) -> Tuple[Dict[str, Any] | None, float]:
+        """Cached answer for the closest question above the threshold (or None) and its similarity."""
+        with self._lock:
+            self._sync_version(kb_version)
+            best = 0.0
+            if self._vectors is not None and self._vectors.shape[1] == vector.shape[0] and self._used.any():
+                scores = np.where(self._used, self._vectors @ vector, -np.inf)
+                while True:
+                    slot = int(scores.argmax())
+                    best = max(float(scores[slot]), 0.0)
+                    if scores[slot] < self.threshold:
+                        break
+                    # Refreshes the LRU position; None if the entry has outlived its TTL
+                    answer = self._entries.get(slot)
+                    if answer is not None:
+                        self.hits += 1
+                        return answer, best
+                    scores[slot] = -np.inf
+            self.misses += 1
+            return None, best
+
+    def store(self, vector: np.ndarray, answer: Dict[str, Any], kb_version: str | None = None):
+        """Caches `answer` for the question embedded as `vector`."""
+        if self._entries.max_size <= 0:
+            return
+        with self._lock:
+            self._sync_version(kb_version)
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._reset()
+                self._vectors = np.zeros((self._capacity, vector.shape[0]), dtype=np.float32)
+
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._used[slot] = True
+            self._entries.set(slot, answer)  # may evict the least recently used entry
+            self.stores += 1
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        entries = self._entries.stats()
+        return {
+            "enabled": ANSWER_CACHE_ENABLED,
+            "threshold": self.threshold,
+            "size": entries["size"],
+            "max_size": entries["max_size"],
+            "ttl_seconds": entries["ttl_seconds"],
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": entries["evictions"],
+            "invalidations": self.invalidations,
+        }
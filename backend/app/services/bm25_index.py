@@ -0,0 +1,120 @@
+from typing import Any, Dict, List
+import numpy as np
+import re
+import os
+
+# Okapi BM25 parameters (term-frequency saturation and document-length normalization)
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Function words that appear in most questions/answers and carry no topic
+STOPWORDS = frozenset("""
+a an and are as at be but by can could do does for from how i if in is it its me my of on or our
+please so that the their them then there this to us was we what when where which who why will
+with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords, so 'api' matches 'API' but not 'rapid'."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def doc_fields(doc: Dict[str, Any]) -> List[str]:
+    """Text the lexical index sees for a KB entry: answer, keywords and question phrasings."""
+    fields = [doc.get("text", "")]
+    fields += doc.get("keywords", [])
+    if doc.get("question_variant"):
+        fields.append(doc["question_variant"])
+    return fields
+
+
+class BM25Index:
+    """
+    Inverted index with precomputed BM25 weights over the KB entries.
+
+    Postings are stored CSR-style: the docs containing the term with id i (see `term_ids`)
+    are doc_ids[ptr[i]:ptr[i + 1]], with their BM25 contribution in weights[...].
+    A query score is then one gather + np.bincount over the postings of its terms.
+    """
+
+    def __init__(self, docs: List[Dict[str, Any]], k1: float = BM25_K1, b: float = BM25_B):
+        self.n_docs = len(docs)
+        doc_tokens = [tokenize(" ".join(doc_fields(doc))) for doc in docs]
+        doc_lengths = np.array([len(tokens) for tokens in doc_tokens], dtype=np.float32)
+        avg_length = float(doc_lengths.mean()) if self.n_docs and doc_lengths.mean() > 0 else 1.0
+
+        # term -> {doc_id: term frequency}
+        postings: Dict[str, Dict[int, int]] = {}
+        for doc_id, tokens in enumerate(doc_tokens):
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+
+        self.term_ids = {term: i for i, term in enumerate(postings)}
+        lengths = [len(counts) for counts in postings.values()]
+        self.ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.ptr[1:])
+        n_postings = int(self.ptr[-1])
+        self.doc_ids = np.fromiter((d for counts in postings.values() for d in counts), dtype=np.int64, count=n_postings)
+        tf = np.fromiter((c for counts in postings.values() for c in counts.values()), dtype=np.float32, count=n_postings)
+
+        doc_freq = np.array(lengths, dtype=np.float32)
+        self.idf = np.log1p((self.n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        self.max_idf = float(self.idf.max()) if self.idf.shape[0] else 1.0
+        term_of_posting = np.repeat(np.arange(len(lengths)), lengths)
+        length_norm = k1 * (1 - b + b * doc_lengths[self.doc_ids] / avg_length)
+        self.weights = self.idf[term_of_posting] * tf * (k1 + 1) / (tf + length_norm)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def _query_terms(self, query: str) -> np.ndarray:
+        """Ids of the query's in-vocabulary terms (each counted once)."""
+        return np.array([self.term_ids[t] for t in dict.fromkeys(tokenize(query)) if t in self.term_ids], dtype=np.int64)
+
+    def scores(self, queries: List[str], normalize: bool = False) -> np.ndarray:
+        """
+        BM25 score of every doc per query, shape (len(queries), len(KB)).
+
+        With normalize=True each row is divided by the summed IDF of the query's terms (at
+        least the IDF of the rarest KB term) and clipped to [0, 1]: 1.0 means the doc matches
+        every query term at a typical frequency, while a doc sharing only common words scores
+        close to 0, even when the query itself is made of common words.
+        """
+        out = np.zeros((len(queries), self.n_docs), dtype=np.float32)
+        for row, query in enumerate(queries):
+            terms = self._query_terms(query)
+            if terms.shape[0] == 0:
+                continue
+            starts, stops = self.ptr[terms], self.ptr[terms + 1]
+            # Flat positions of all postings of the query terms, without a Python loop per term
+            sizes = stops - starts
+            positions = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(int(sizes.sum()))
+            out[row] = np.bincount(self.doc_ids[positions], weights=self.weights[positions], minlength=self.n_docs)
+            if normalize:
+                out[row] /= max(self.idf[terms].sum(), self.max_idf)
+        if normalize:
+            np.clip(out, 0.0, 1.0, out=out)
+        return out
+
+    def subset(self, doc_ids: np.ndarray) -> "BM25Index":
+        """
+        Index over the given docs only (renumbered 0..len(doc_ids)-1) that keeps this index's
+        IDF and weights, so a doc scores the same in a filtered partition as in the whole KB.
+        """
+        new_ids = np.full(self.n_docs, -1, dtype=np.int64)
+        new_ids[doc_ids] = np.arange(len(doc_ids))
+        keep = new_ids[self.doc_ids] >= 0
+        term_of_posting = np.repeat(np.arange(len(self.idf)), np.diff(self.ptr))
+
+        sub = BM25Index.__new__(BM25Index)
+        sub.n_docs = len(doc_ids)
+        sub.term_ids, sub.idf, sub.max_idf = self.term_ids, self.idf, self.max_idf
+        sub.ptr = np.zeros_like(self.ptr)
+        np.cumsum(np.bincount(term_of_posting[keep], minlength=len(self.idf)), out=sub.ptr[1:])
+        sub.doc_ids = new_ids[self.doc_ids[keep]]
+        sub.weights = self.weights[keep]
+        return sub
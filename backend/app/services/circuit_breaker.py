@@ -0,0 +1,143 @@
+from collections import deque
+from typing import Any, Dict
+import threading
+import time
+import os
+
+# Circuit breaker around Groq calls (see LLMService._complete)
+BREAKER_ENABLED = os.getenv("LLM_BREAKER_ENABLED", "true").lower() == "true"
+# Outcomes of the last BREAKER_WINDOW calls decide; nothing trips before BREAKER_MIN_CALLS of them
+BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+# Share of failed calls, or of calls slower than BREAKER_SLOW_CALL_S, that opens the circuit
+BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_S = float(os.getenv("LLM_BREAKER_SLOW_CALL_S", "10"))
+BREAKER_SLOW_RATE = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5"))
+# Seconds the circuit stays open before a half-open probe call is let through
+BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker over a rolling window of call outcomes.
+
+    Closed: calls go through and their outcome (success, latency) is recorded. Once the
+    window holds `min_calls` outcomes and the failure rate or the slow-call rate reaches
+    its threshold, the circuit opens. Open: allow() is False (callers fail fast to a local
+    fallback) until `cooldown_s` has passed. Half-open: one probe call at a time goes
+    through; a fast success closes the circuit, a failure or slow call reopens it.
+    A probe that never reports back is replaced by another after `cooldown_s`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, enabled: bool = BREAKER_ENABLED, window: int = BREAKER_WINDOW,
+                 min_calls: int = BREAKER_MIN_CALLS, failure_rate: float = BREAKER_FAILURE_RATE,
+                 slow_call_s: float = BREAKER_SLOW_CALL_S, slow_rate: float = BREAKER_SLOW_RATE,
+                 cooldown_s: float = BREAKER_COOLDOWN_S):
+        self.enabled = enabled
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_s = slow_call_s
+        self.slow_rate = slow_rate
+        self.cooldown_s = cooldown_s
+        self._outcomes: "deque[tuple[bool, bool]]" = deque(maxlen=window)  # (failed, slow)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+
+        self.opened = 0
+        self.rejected = 0
+        self.probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_s:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now (counts a rejection when it may not)."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and now - self._opened_at >= self.cooldown_s:
+                self._state = self.HALF_OPEN
+                self._probe_started = None
+            if self._state == self.HALF_OPEN and (
+                    self._probe_started is None or now - self._probe_started >= self.cooldown_s):
+                self._probe_started = now
+                self.probes += 1
+                print("🔌 Circuit half-open: probing")
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, latency_s: float):
+        """Outcome of a call that allow() let through."""
+        if not self.enabled:
+            return
+        slow = latency_s > self.slow_call_s
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if ok and not slow:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    print(f"✅ Circuit closed: probe succeeded in {latency_s:.2f}s")
+                else:
+                    self._open(f"probe {'failed' if not ok else f'took {latency_s:.2f}s'}")
+                self._probe_started = None
+                return
+
+            self._outcomes.append((not ok, slow))
+            if self._state != self.CLOSED or len(self._outcomes) < self.min_calls:
+                return
+            n = len(self._outcomes)
+            failures = sum(failed for failed, _ in self._outcomes) / n
+            slow_calls = sum(s for _, s in self._outcomes) / n
+            if failures >= self.failure_rate:
+                self._open(f"{failures:.0%} of the last {n} calls failed")
+            elif slow_calls >= self.slow_rate:
+                self._open(f"{slow_calls:.0%} of the last {n} calls took over {self.slow_call_s:.0f}s")
+
+    def _open(self, reason: str):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+        print(f"⚡ Circuit open for {self.cooldown_s:.0f}s: {reason}")
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+            self._probe_started = None
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            n = len(self._outcomes)
+            return {
+                "enabled": self.enabled,
+                "state": state,
+                "window_calls": n,
+                "failure_rate": round(sum(f for f, _ in self._outcomes) / n, 3) if n else 0.0,
+                "slow_rate": round(sum(s for _, s in self._outcomes) / n, 3) if n else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "probes": self.probes,
+                "thresholds": {"failure_rate": self.failure_rate, "slow_call_s": self.slow_call_s,
+                               "slow_rate": self.slow_rate, "min_calls": self.min_calls,
+                               "cooldown_s": self.cooldown_s},
+            }
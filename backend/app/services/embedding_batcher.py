@@ -0,0 +1,115 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+import numpy as np
+import threading
+import queue
+import time
+import os
+
+# Micro-batching of concurrent query encodes (one transformer pass for many chats)
+BATCHING_ENABLED = os.getenv("VECTOR_BATCHING", "true").lower() == "true"
+BATCH_WINDOW_MS = float(os.getenv("VECTOR_BATCH_WINDOW_MS", "2"))
+BATCH_MAX_SIZE = int(os.getenv("VECTOR_BATCH_MAX_SIZE", "32"))
+
+
+class EmbeddingBatcher:
+    """
+    Collects encode requests from concurrent callers and runs them as one model batch.
+
+    A single worker thread takes the first waiting request, keeps collecting for up to
+    `window_ms` (or until `max_batch` texts), encodes everything at once and fans the
+    vectors back out to the waiting callers. Requests that arrive while a batch is being
+    encoded simply join the next one, so batches grow with load.
+
+    The window is only waited out while there is concurrency (the previous batch served
+    more than one request); a lone caller on an idle server is encoded immediately.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 window_ms: float = BATCH_WINDOW_MS, max_batch: int = BATCH_MAX_SIZE):
+        self._encode_fn = encode_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple[List[str], Future, float]]" = queue.Queue()
+
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+        self.encode_seconds = 0.0
+        self._last_batch_requests = 0
+
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Blocking: returns the vectors for `texts` once their batch has been encoded."""
+        future: Future = Future()
+        self._queue.put((texts, future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        n_texts = len(batch[0][0])
+        window = self.window if self._last_batch_requests > 1 else 0
+        deadline = time.perf_counter() + window
+
+        while n_texts < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_texts += len(item[0])
+        self._last_batch_requests = len(batch)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for item in batch for text in item[0]]
+
+            start = time.perf_counter()
+            try:
+                vectors = self._encode_fn(texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            encode_seconds = time.perf_counter() - start
+
+            offset = 0
+            for item_texts, future, _ in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.texts += len(texts)
+                self.batch_sizes[len(texts)] = self.batch_sizes.get(len(texts), 0) + 1
+                self.encode_seconds += encode_seconds
+                for _, _, submitted_at in batch:
+                    delay = start - submitted_at
+                    self.queue_delay_total += delay
+                    self.queue_delay_max = max(self.queue_delay_max, delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "avg_queue_delay_ms": round(self.queue_delay_total * 1000 / self.requests, 3) if self.requests else 0.0,
+                "max_queue_delay_ms": round(self.queue_delay_max * 1000, 3),
+                "avg_encode_ms_per_batch": round(self.encode_seconds * 1000 / self.batches, 3) if self.batches else 0.0,
+                "queued": self._queue.qsize()
+            }
@@ -0,0 +1,196 @@
+from typing import Any, Dict, List
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from .history_service import estimate_tokens
+
+# Latency model: lognormal time to first token (median / spread) + output tokens at a decode speed
+FAKE_GROQ_LATENCY_MS = float(os.getenv("FAKE_GROQ_LATENCY_MS", "300"))
+FAKE_GROQ_LATENCY_SIGMA = float(os.getenv("FAKE_GROQ_LATENCY_SIGMA", "0.4"))
+FAKE_GROQ_TOKENS_PER_S = float(os.getenv("FAKE_GROQ_TOKENS_PER_S", "250"))
+# Prompt tokens read per second before the first token (0 = prompt length adds no latency)
+FAKE_GROQ_PREFILL_TOKENS_PER_S = float(os.getenv("FAKE_GROQ_PREFILL_TOKENS_PER_S", "0"))
+# Share of requests answered with a 500
+FAKE_GROQ_ERROR_RATE = float(os.getenv("FAKE_GROQ_ERROR_RATE", "0"))
+# Chance per request of starting a rate-limit burst: every request within the next
+# FAKE_GROQ_429_BURST_S seconds gets a 429 with Retry-After = time left in the burst
+FAKE_GROQ_429_RATE = float(os.getenv("FAKE_GROQ_429_RATE", "0"))
+FAKE_GROQ_429_BURST_S = float(os.getenv("FAKE_GROQ_429_BURST_S", "2"))
+
+ESCALATE_WORDS = ("down", "crash", "error", "broken", "urgent", "refund", "charged", "not working", "human",
+                  "agent", "escalate", "لا يعمل", "عطل")
+
+
+class FakeGroq:
+    """
+    Local stand-in for Groq's OpenAI-compatible chat-completions API (POST /openai/v1/chat/completions,
+    plain and streamed). It answers the decision, classification and summary prompts of LLMService
+    with schema-valid content and simulates latency, server errors and 429 bursts.
+    Serve it (`python -m app.services.fake_groq`) and set LLM_BASE_URL, or set LLM_FAKE=true
+    to use it in-process.
+    """
+
+    def __init__(self, latency_ms: float = FAKE_GROQ_LATENCY_MS, latency_sigma: float = FAKE_GROQ_LATENCY_SIGMA,
+                 tokens_per_s: float = FAKE_GROQ_TOKENS_PER_S, error_rate: float = FAKE_GROQ_ERROR_RATE,
+                 rate_limit_rate: float = FAKE_GROQ_429_RATE, burst_s: float = FAKE_GROQ_429_BURST_S,
+                 prefill_tokens_per_s: float = FAKE_GROQ_PREFILL_TOKENS_PER_S, seed: int | None = None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_s = tokens_per_s
+        self.prefill_tokens_per_s = prefill_tokens_per_s
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.burst_s = burst_s
+        self.rng = random.Random(seed)
+        self._burst_until = 0.0
+        self.counts = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0}
+
+        self.app = FastAPI(title="Fake Groq")
+        self.app.post("/openai/v1/chat/completions")(self.chat_completions)
+        self.app.get("/stats")(self.stats)
+
+    def transport(self) -> httpx.ASGITransport:
+        """In-process transport for httpx / AsyncGroq (responses are delivered whole, even when streamed)."""
+        return httpx.ASGITransport(app=self.app)
+
+    async def stats(self) -> Dict[str, Any]:
+        return dict(self.counts)
+
+    # --- Replies ---
+
+    @staticmethod
+    def _kb_answer(system: str) -> str | None:
+        match = re.search(r"^Content: (.+)$", system, re.MULTILINE)
+        return match.group(1).strip() if match else None
+
+    @staticmethod
+    def _classification(text: str) -> Dict[str, str]:
+        from .ai_service import AIService
+        mock = AIService._mock_llm_classification(text)
+        lower = text.lower()
+        if any(w in lower for w in ("price", "pricing", "buy", "quote", "plan")):
+            intent = "sales"
+        elif any(w in lower for w in ("again", "still", "terrible", "worst", "angry")):
+            intent = "complaint"
+        elif any(w in lower for w in ESCALATE_WORDS):
+            intent = "support"
+        else:
+            intent = "inquiry"
+        return {"department": mock["department"], "priority": mock["priority"],
+                "summary": " ".join(text.split())[:60], "intent": intent}
+
+    def reply(self, messages: List[Dict[str, Any]]) -> str:
+        """Completion content for LLMService's prompts (recognized by their wording)."""
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        last = messages[-1]["content"] if messages else ""
+
+        if last.startswith("Customer Message:"):
+            classification = self._classification(last[len("Customer Message:"):].strip())
+            return json.dumps({**classification, "reasoning": "fake classifier"})
+
+        if "running summary" in system:
+            new = last.split("NEW MESSAGES:\n")[-1]
+            user_lines = [line[len("USER: "):] for line in new.splitlines() if line.startswith("USER: ")]
+            return "Customer said: " + " / ".join(line[:80] for line in user_lines)
+
+        if "Customer Service Coordinator" in system:
+            lower = last.lower()
+            if any(w in lower for w in ESCALATE_WORDS):
+                decision = {"action": "escalate", "text": "I'm forwarding this to our team so a specialist can take a look.",
+                            "reasoning": "fake: issue needs a human"}
+                if "=== ESCALATION CLASSIFICATION ===" in system:
+                    decision.update(self._classification(last))
+            elif len(last.split()) < 3:
+                decision = {"action": "ask_question", "text": "Could you tell me a bit more about what you need?",
+                            "reasoning": "fake: vague request"}
+            else:
+                answer = self._kb_answer(system) or "Thanks for reaching out! Our team works Sunday to Thursday, 9 AM - 5 PM."
+                decision = {"action": "answer", "text": answer, "reasoning": "fake: answered from KB"}
+            return json.dumps(decision, ensure_ascii=False)
+
+        return "OK"
+
+    # --- Endpoint ---
+
+    def _latency_s(self, completion_tokens: int, prompt_tokens: int = 0) -> float:
+        first_token = self.latency_ms / 1000 * self.rng.lognormvariate(0, self.latency_sigma)
+        if self.prefill_tokens_per_s:
+            first_token += prompt_tokens / self.prefill_tokens_per_s
+        return first_token + completion_tokens / self.tokens_per_s
+
+    @staticmethod
+    def _error(status: int, message: str, kind: str, headers: Dict[str, str] | None = None) -> JSONResponse:
+        return JSONResponse({"error": {"message": message, "type": kind}}, status_code=status, headers=headers)
+
+    async def chat_completions(self, request: Request):
+        body = await request.json()
+        self.counts["requests"] += 1
+
+        now = time.monotonic()
+        if now >= self._burst_until and self.rng.random() < self.rate_limit_rate:
+            self._burst_until = now + self.burst_s
+        if now < self._burst_until:
+            self.counts["rate_limited"] += 1
+            retry_after = f"{self._burst_until - now:.2f}"
+            return self._error(429, f"Rate limit reached. Please try again in {retry_after}s.", "tokens",
+                               headers={"retry-after": retry_after})
+        if self.rng.random() < self.error_rate:
+            self.counts["errors"] += 1
+            await asyncio.sleep(self._latency_s(0))
+            return self._error(500, "Internal Server Error (fake)", "internal_server_error")
+
+        messages = body.get("messages", [])
+        content = self.reply(messages)
+        if body.get("max_tokens"):
+            content = content[:body["max_tokens"] * 4]
+        usage = {
+            "prompt_tokens": sum(estimate_tokens(m.get("content")) for m in messages),
+            "completion_tokens": estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "fake")
+        self.counts["ok"] += 1
+
+        if not body.get("stream"):
+            await asyncio.sleep(self._latency_s(usage["completion_tokens"], usage["prompt_tokens"]))
+            return {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            }
+
+        async def chunks():
+            await asyncio.sleep(self._latency_s(0, usage["prompt_tokens"]))
+            pieces = [content[i:i + 4] for i in range(0, len(content), 4)]  # ~1 token per chunk
+            for i, piece in enumerate(pieces):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                if i == len(pieces) - 1:
+                    chunk["choices"][0]["finish_reason"] = "stop"
+                    chunk["x_groq"] = {"id": completion_id, "usage": usage}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(1 / self.tokens_per_s)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local fake Groq chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    print(f"🧪 Fake Groq on http://{args.host}:{args.port} (set LLM_BASE_URL to this address)")
+    uvicorn.run(FakeGroq().app, host=args.host, port=args.port)
@@ -0,0 +1,137 @@
+from typing import Dict, List, Tuple
+from datetime import datetime
+import os
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Token budget for the conversation part of the decision prompt (summary + recent messages)
+HISTORY_TOKEN_BUDGET = int(os.getenv("LLM_HISTORY_TOKEN_BUDGET", "1200"))
+# Most transcript tokens sent to the summary model in one call; a longer backlog is folded over several turns
+SUMMARY_INPUT_TOKEN_BUDGET = int(os.getenv("LLM_SUMMARY_INPUT_TOKENS", "3000"))
+# Rough per-message overhead of the chat format (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str | None) -> int:
+    """
+    Token estimate without the model's tokenizer: ~4 UTF-8 bytes per token, which is
+    close for English and conservative for Arabic (2 bytes per letter).
+    """
+    if not text:
+        return 0
+    return (len(text.encode('utf-8')) + 3) // 4
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def fit_newest(history: List[Dict[str, str]], budget: int) -> int:
+    """Number of newest messages whose tokens fit in `budget` (filled from newest to oldest)."""
+    used = 0
+    for n, message in enumerate(reversed(history)):
+        used += message_tokens(message)
+        if used > budget:
+            return n
+    return len(history)
+
+
+def fit_oldest(history: List[Dict[str, str]], budget: int) -> int:
+    """Number of oldest messages whose tokens fit in `budget` (filled from oldest to newest)."""
+    return fit_newest(history[::-1], budget)
+
+
+def window(history: List[Dict[str, str]], budget: int = HISTORY_TOKEN_BUDGET) -> List[Dict[str, str]]:
+    """
+    Newest messages that fit in `budget` tokens, oldest first. The latest message is always
+    kept, cut down to the budget if it alone exceeds it.
+    """
+    if not history:
+        return []
+    keep = fit_newest(history, budget)
+    if keep:
+        return history[-keep:]
+    last = history[-1]
+    max_chars = max(budget - MESSAGE_OVERHEAD_TOKENS, 1) * 2  # >= 2 chars per token, even for Arabic
+    return [{**last, "content": last["content"][:max_chars] + " [...]"}]
+
+
+class HistoryService:
+    """
+    Conversation history for the LLM under a token budget: the most recent messages verbatim,
+    older ones folded into a rolling per-session ChatSummary that is extended incrementally.
+    """
+
+    @staticmethod
+    def over_budget(history: List[Dict[str, str]], summary: str | None) -> bool:
+        """True when load(summarize=True) would fold older messages into the summary."""
+        return fit_newest(history, HISTORY_TOKEN_BUDGET - estimate_tokens(summary)) < len(history)
+
+    @staticmethod
+    async def load(session_id: str, db_session: AsyncSession,
+                   summarize: bool = True) -> Tuple[List[Dict[str, str]], str | None]:
+        """
+        (recent messages, summary of older ones) for a session. When the messages outgrow
+        the budget (and `summarize` is set), the older ones are summarized down to half the
+        budget so the summary call runs once every few turns rather than on every message.
+        At most SUMMARY_INPUT_TOKEN_BUDGET tokens of them go to the summary model per call.
+        """
+        from app.models.models import ChatMessage, ChatSummary
+        from .llm_service import LLMService
+
+        summary_row = (await db_session.exec(
+            select(ChatSummary).where(ChatSummary.session_id == session_id)
+        )).first()
+        summarized_until = summary_row.summarized_until if summary_row else 0
+        summary = summary_row.summary if summary_row else None
+
+        # Only messages not yet folded into the summary are loaded
+        statement = (select(ChatMessage)
+                     .where(ChatMessage.session_id == session_id, ChatMessage.id > summarized_until)
+                     .order_by(ChatMessage.created_at, ChatMessage.id))
+        rows = (await db_session.exec(statement)).all()
+        history = [{"role": m.role, "content": m.content} for m in rows]
+        ids = [m.id for m in rows]
+
+        if not summarize or not HistoryService.over_budget(history, summary):
+            return history, summary
+
+        n_older = len(rows) - max(fit_newest(history, HISTORY_TOKEN_BUDGET // 2), 1)
+        if n_older <= 0:
+            return history, summary
+        # Oldest messages first, as many as fit the summarizer's input budget (a single oversized
+        # one is truncated); whatever is left is folded in on the next turns
+        n_fold = min(max(fit_oldest(history[:n_older], SUMMARY_INPUT_TOKEN_BUDGET), 1), n_older)
+        to_fold = history[:n_fold] if n_fold > 1 else window(history[:1], SUMMARY_INPUT_TOKEN_BUDGET)
+        new_summary = await LLMService.summarize_history(summary, to_fold)
+        if not new_summary:
+            return history, summary  # The prompt window drops what doesn't fit instead
+
+        folded_until = ids[n_fold - 1]
+        if summary_row is None:
+            summary_row = ChatSummary(session_id=session_id, summary=new_summary)
+        try:
+            await HistoryService._save_summary(db_session, summary_row, new_summary, folded_until)
+        except IntegrityError:
+            # A concurrent turn of this session created the summary first: keep whichever covers more
+            await db_session.rollback()
+            summary_row = (await db_session.exec(
+                select(ChatSummary).where(ChatSummary.session_id == session_id)
+            )).first()
+            if summary_row.summarized_until >= folded_until:
+                until, summary = summary_row.summarized_until, summary_row.summary
+                return [m for m, i in zip(history, ids) if i > until], summary
+            await HistoryService._save_summary(db_session, summary_row, new_summary, folded_until)
+
+        print(f"🗜️ Session {session_id}: folded {n_fold} messages into the summary "
+              f"(~{estimate_tokens(new_summary)} tokens)")
+        return history[n_fold:], new_summary
+
+    @staticmethod
+    async def _save_summary(db_session: AsyncSession, summary_row, summary: str, summarized_until: int):
+        summary_row.summary = summary
+        summary_row.summarized_until = summarized_until
+        summary_row.updated_at = datetime.utcnow()
+        db_session.add(summary_row)
+        await db_session.commit()
@@ -0,0 +1,95 @@
+from typing import List
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JsonFieldStream:
+    """
+    Incrementally decodes one top-level string field of a JSON object that arrives in chunks
+    (e.g. "text" of a streamed LLM completion): feed() returns the newly decoded characters
+    of that field's value. Text before the opening '{' (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.value = ""
+        self.done = False
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._unicode: str | None = None  # hex digits of a \\uXXXX escape being read
+        self._high_surrogate: int | None = None
+        self._string: List[str] = []  # current top-level key
+        self._expect_key = False
+        self._last_key: str | None = None
+        self._streaming = False  # inside the target field's value
+
+    def _emit(self, out: List[str], char: str):
+        if self._streaming:
+            out.append(char)
+        elif self._expect_key:
+            self._string.append(char)
+
+    def _code_unit(self, out: List[str], code: int):
+        # Pairs UTF-16 surrogates (\\ud83d\\ude00) back into one character
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._emit(out, chr(code))
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        for char in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                if self._unicode is not None:
+                    self._unicode += char
+                    if len(self._unicode) == 4:
+                        self._code_unit(out, int(self._unicode, 16))
+                        self._unicode = None
+                elif self._escape:
+                    self._escape = False
+                    if char == 'u':
+                        self._unicode = ""
+                    else:
+                        self._emit(out, _ESCAPES.get(char, char))
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._streaming:
+                        self._streaming = False
+                        self.done = True
+                    elif self._expect_key:
+                        self._last_key = "".join(self._string)
+                        self._expect_key = False
+                else:
+                    self._emit(out, char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string = []
+                # A string value right after "<field>": is the one we stream
+                self._streaming = self._depth == 1 and not self._expect_key and self._last_key == self.field
+            elif char in '{[':
+                self._depth += 1
+                self._expect_key = char == '{' and self._depth == 1
+            elif char in '}]':
+                self._depth -= 1
+            elif char == ',' and self._depth == 1:
+                self._expect_key = True
+                self._last_key = None
+            elif char == ':':
+                continue
+            elif not char.isspace() and self._depth == 1:
+                self._last_key = None  # a non-string value: not our field
+
+        decoded = "".join(out)
+        self.value += decoded
+        return decoded
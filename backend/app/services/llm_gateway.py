@@ -0,0 +1,175 @@
+from collections import deque
+from typing import Any, Dict, List
+import asyncio
+import heapq
+import itertools
+import time
+import os
+
+import numpy as np
+
+# Outbound Groq calls in flight at once (0 = unlimited); the rest wait in the priority queue
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Tokens per minute (prompt + completion) the calls may spend (0 = no budget)
+LLM_TPM_BUDGET = int(os.getenv("LLM_TPM_BUDGET", "0"))
+
+
+class GatewayTicket:
+    """A granted slot: hold it for the duration of one Groq request, then release() it."""
+
+    def __init__(self, priority: int, tokens: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.released = False
+
+
+class LLMGateway:
+    """
+    Admission control for outbound LLM requests: at most `max_concurrency` in flight and
+    at most `tpm_budget` tokens per minute (a token bucket refilled continuously, so a
+    full minute's budget can be spent in a burst and then trickles back).
+
+    Requests that can't go now wait in a priority queue (lower number first, FIFO within
+    a priority), so escalations and running conversations are served before new inquiries
+    when Groq is the bottleneck. Token needs are estimated up front and corrected with the
+    real usage on release().
+    """
+
+    PRIORITY_ESCALATION = 0  # classification of an escalation (a human is waiting on the report)
+    PRIORITY_SESSION = 1     # follow-up turns of a running conversation, history summaries
+    PRIORITY_NEW = 2         # first message of a new chat
+    PRIORITY_NAMES = {0: "escalation", 1: "session", 2: "new"}
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, tpm_budget: int = LLM_TPM_BUDGET):
+        self.max_concurrency = max_concurrency
+        self.tpm_budget = tpm_budget
+        self._tokens = float(tpm_budget)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._queue: List[tuple] = []  # (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+        self.granted = 0
+        self.queued = 0
+        self.max_depth = 0
+        self.queued_by_priority: Dict[int, int] = {}
+        self.waited = 0  # queued requests that were granted (not cancelled)
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits: "deque[float]" = deque(maxlen=1000)  # recent waits of queued requests
+
+    # --- Token bucket ---
+
+    def _refill(self):
+        if not self.tpm_budget:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.tpm_budget, self._tokens + (now - self._refilled_at) * self.tpm_budget / 60)
+        self._refilled_at = now
+
+    def _fits(self, tokens: int) -> bool:
+        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+            return False
+        if self.tpm_budget:
+            self._refill()
+            return self._tokens >= min(tokens, self.tpm_budget)
+        return True
+
+    def _grant(self, priority: int, tokens: int) -> GatewayTicket:
+        self._in_flight += 1
+        self._tokens -= tokens if self.tpm_budget else 0
+        self.granted += 1
+        return GatewayTicket(priority, tokens)
+
+    # --- Queue ---
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for *_, future in self._queue if not future.done())
+
+    async def acquire(self, priority: int = PRIORITY_NEW, tokens: int = 0) -> GatewayTicket:
+        """Waits (in priority order) until the request may be sent; `tokens` is its estimated usage."""
+        if not self._queue and self._fits(tokens):
+            return self._grant(priority, tokens)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), tokens, future))
+        self.queued += 1
+        self.queued_by_priority[priority] = self.queued_by_priority.get(priority, 0) + 1
+        self.max_depth = max(self.max_depth, self.depth)
+        start = time.perf_counter()
+        self._dispatch()
+        try:
+            ticket = await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(future.result())  # granted while being cancelled
+            self._dispatch()
+            raise
+
+        waited = time.perf_counter() - start
+        self.waited += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self._waits.append(waited)
+        return ticket
+
+    def release(self, ticket: GatewayTicket, used_tokens: int | None = None):
+        """Frees the slot; `used_tokens` (the real usage, when known) corrects the estimate."""
+        if ticket.released:
+            return
+        ticket.released = True
+        self._in_flight -= 1
+        if self.tpm_budget and used_tokens is not None:
+            self._tokens += ticket.tokens - used_tokens
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grants queued requests, highest priority first, while the limits allow."""
+        while self._queue:
+            priority, _, tokens, future = self._queue[0]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+            if not self._fits(tokens):
+                break
+            heapq.heappop(self._queue)
+            future.set_result(self._grant(priority, tokens))
+
+        # Blocked on tokens only: wake up once the bucket has refilled enough for the head
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._queue and self.tpm_budget and \
+                not (self.max_concurrency and self._in_flight >= self.max_concurrency):
+            tokens, future = self._queue[0][2], self._queue[0][3]
+            missing = min(tokens, self.tpm_budget) - self._tokens
+            delay = max(missing * 60 / self.tpm_budget, 0.01)
+            self._timer = future.get_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        waits = np.array(self._waits) * 1000 if self._waits else None
+        return {
+            "max_concurrency": self.max_concurrency,
+            "tpm_budget": self.tpm_budget,
+            "tokens_available": round(self._tokens) if self.tpm_budget else None,
+            "in_flight": self._in_flight,
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "granted": self.granted,
+            "queued": self.queued,
+            "queued_by_priority": {self.PRIORITY_NAMES.get(p, str(p)): n
+                                   for p, n in sorted(self.queued_by_priority.items())},
+            "wait_ms": {
+                "avg": round(self.wait_total / self.waited * 1000, 1) if self.waited else 0.0,
+                "p50": round(float(np.percentile(waits, 50)), 1) if waits is not None else 0.0,
+                "p95": round(float(np.percentile(waits, 95)), 1) if waits is not None else 0.0,
+                "max": round(self.wait_max * 1000, 1),
+            },
+        }
@@ -0,0 +1,161 @@
+from typing import List
+import numpy as np
+import json
+import os
+
+# Embedding runtime: 'torch' (sentence-transformers, default), 'onnx' (onnxruntime, same vectors)
+# or 'onnx-int8' (onnxruntime with dynamically int8-quantized weights: smaller/faster, ~0.99 cosine)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Exported models are cached here (one sub-directory per EMBEDDING_MODEL)
+ONNX_DIR = os.getenv(
+    "EMBEDDING_ONNX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core', 'onnx_models')
+)
+# onnxruntime intra-op threads (0 = onnxruntime default, one per core)
+ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedder_config.json"
+POOLING_MODES = ("mean", "cls", "max")
+
+
+class OnnxEmbedder:
+    """
+    sentence-transformers compatible encoder (encode / get_sentence_embedding_dimension) that runs
+    the transformer with onnxruntime and the Rust fast tokenizer, without loading PyTorch.
+    The model is exported once from sentence-transformers and reused from ONNX_DIR afterwards.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, onnx_dir: str = ONNX_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = os.path.join(onnx_dir, model_name.strip("/").replace("/", "__"))
+        config = self._read_config(model_dir)
+        if config is None or config.get("model") != model_name:
+            config = self.export(model_name, model_dir)
+        if quantize and not os.path.exists(os.path.join(model_dir, ONNX_INT8_FILE)):
+            self.quantize(model_dir)
+
+        self.model_name = model_name
+        self.pooling = config["pooling"]
+        self.dim = config["dim"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=config["pad_id"], pad_token=config["pad_token"])
+
+        options = ort.SessionOptions()
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_INT8_FILE if quantize else ONNX_FILE),
+            options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    @staticmethod
+    def _read_config(model_dir: str) -> dict | None:
+        path = os.path.join(model_dir, CONFIG_FILE)
+        if not (os.path.exists(path) and os.path.exists(os.path.join(model_dir, ONNX_FILE))):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def export(model_name: str, model_dir: str) -> dict:
+        """One-off export of the sentence-transformers model to ONNX (needs torch + sentence-transformers)."""
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        print(f"📦 Exporting {model_name} to ONNX ({model_dir})...")
+        st_model = SentenceTransformer(model_name, device="cpu")
+        transformer, pooling = st_model[0], st_model[1]
+        # 'pooling_mode' (sentence-transformers >= 5) or get_pooling_mode_str() (older releases)
+        pooling_mode = getattr(pooling, "pooling_mode", None) or pooling.get_pooling_mode_str()
+        if pooling_mode not in POOLING_MODES:
+            raise ValueError(f"Pooling '{pooling_mode}' is not supported by the ONNX backend")
+
+        tokenizer = st_model.tokenizer
+        input_names = [name for name in tokenizer.model_input_names
+                       if name in ("input_ids", "attention_mask", "token_type_ids")]
+
+        class LastHiddenState(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+        os.makedirs(model_dir, exist_ok=True)
+        sample = tokenizer(["export sample", "a longer export sample sentence"], padding=True, return_tensors="pt")
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+        with torch.no_grad():
+            torch.onnx.export(
+                LastHiddenState(transformer.auto_model).eval(),
+                tuple(sample[name] for name in input_names),
+                os.path.join(model_dir, ONNX_FILE),
+                input_names=input_names, output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes, opset_version=17, dynamo=False
+            )
+        tokenizer.backend_tokenizer.save(os.path.join(model_dir, TOKENIZER_FILE))
+
+        config = {
+            "model": model_name,
+            "pooling": pooling_mode,
+            "dim": st_model.get_sentence_embedding_dimension(),
+            "max_seq_length": st_model.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_id": tokenizer.pad_token_id,
+        }
+        with open(os.path.join(model_dir, CONFIG_FILE), 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        print("✅ ONNX export done.")
+        return config
+
+    @staticmethod
+    def quantize(model_dir: str):
+        """Dynamic int8 quantization of the exported weights (activations stay float)."""
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        print("📦 Quantizing ONNX model to int8...")
+        quantize_dynamic(
+            os.path.join(model_dir, ONNX_FILE), os.path.join(model_dir, ONNX_INT8_FILE),
+            weight_type=QuantType.QInt8
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        if self.pooling == "max":
+            return np.where(mask[..., None] > 0, hidden, -np.inf).max(axis=1)
+        weights = mask[..., None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+
+    def encode(self, texts: List[str] | str, batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Embeds texts (same pooling as the sentence-transformers model; not normalized)."""
+        if isinstance(texts, str):
+            texts = [texts]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        # Batch texts of similar length together so little compute is spent on padding
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in rows])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+            out[rows] = self._pool(hidden, inputs["attention_mask"])
+        return out
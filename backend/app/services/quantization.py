@@ -0,0 +1,100 @@
+from typing import Any
+import numpy as np
+import threading
+import os
+
+# In-memory storage of KB embeddings:
+# - 'float32': full precision (4 bytes / dim)
+# - 'float16': half precision (2 bytes / dim)
+# - 'int8':    per-vector symmetric int8 + one float32 scale per row (~1 byte / dim)
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")
+STORAGE_MODES = ("float32", "float16", "int8")
+
+# Rows dequantized at a time while scoring (bounded scratch instead of a full float32 copy)
+SCORE_BLOCK_ROWS = 4096
+
+
+class QuantizedVectors:
+    """
+    Row-major matrix of L2-normalized KB vectors in float32, float16 or int8 storage.
+    Scores are computed block by block, so a query never dequantizes the whole matrix.
+    """
+
+    _scratch = threading.local()
+
+    def __init__(self, vectors: np.ndarray, mode: str = VECTOR_STORAGE):
+        if mode not in STORAGE_MODES:
+            print(f"⚠️ Unknown VECTOR_STORAGE '{mode}'. Using float32.")
+            mode = "float32"
+        self.mode = mode
+        self.shape = vectors.shape
+        self.scales = None
+
+        if mode == "float32":
+            self.data = np.ascontiguousarray(vectors, dtype=np.float32)
+        elif mode == "float16":
+            self.data = np.asarray(vectors, dtype=np.float16)
+        else:
+            self.data, self.scales = self._quantize_int8(vectors)
+
+    @staticmethod
+    def _quantize_int8(vectors: np.ndarray):
+        codes = np.empty(vectors.shape, dtype=np.int8)
+        scales = np.empty(vectors.shape[0], dtype=np.float32)
+        for start in range(0, vectors.shape[0], SCORE_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            block_scales = np.abs(block).max(axis=1) / 127.0
+            block_scales[block_scales == 0] = 1.0
+            codes[start:start + block.shape[0]] = np.clip(np.rint(block / block_scales[:, None]), -127, 127)
+            scales[start:start + block.shape[0]] = block_scales
+        return codes, scales
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, rows: Any) -> np.ndarray:
+        """Dequantized float32 copy of the selected rows (slice or index array)."""
+        block = np.asarray(self.data[rows], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[rows][..., None]
+        return block
+
+    def _block_scratch(self, n_rows: int) -> np.ndarray:
+        scratch = getattr(self._scratch, "block", None)
+        if scratch is None or scratch.shape[0] < n_rows or scratch.shape[1] != self.shape[1]:
+            scratch = np.empty((n_rows, self.shape[1]), dtype=np.float32)
+            self._scratch.block = scratch
+        return scratch[:n_rows]
+
+    def dot(self, query_vec: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """out[i] = <row i, query_vec> for every row."""
+        if self.mode == "float32":
+            return np.dot(self.data, query_vec, out=out)
+
+        for start in range(0, self.shape[0], SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, self.shape[0])
+            block = self._block_scratch(stop - start)
+            block[...] = self.data[start:stop]
+            np.dot(block, query_vec, out=out[start:stop])
+            if self.scales is not None:
+                out[start:stop] *= self.scales[start:stop]
+        return out
+
+    def scores(self, query_vecs: np.ndarray) -> np.ndarray:
+        """Score matrix of shape (len(query_vecs), len(self)) against a batch of queries."""
+        if self.mode == "float32":
+            return query_vecs @ self.data.T
+
+        out = np.empty((query_vecs.shape[0], self.shape[0]), dtype=np.float32)
+        for start in range(0, self.shape[0], SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, self.shape[0])
+            block = self._block_scratch(stop - start)
+            block[...] = self.data[start:stop]
+            np.matmul(query_vecs, block.T, out=out[:, start:stop])
+            if self.scales is not None:
+                out[:, start:stop] *= self.scales[start:stop]
+        return out
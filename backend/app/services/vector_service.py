@@ -1,100 +1,786 @@
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Dict, Any, Tuple, Iterable
+from .ann_index import build_index, ANN_BACKEND
+from .bm25_index import BM25Index
+from .cache import LRUCache
+from .quantization import QuantizedVectors, VECTOR_STORAGE
+from .embedding_batcher import EmbeddingBatcher, BATCHING_ENABLED
+from .onnx_embedder import OnnxEmbedder, EMBEDDING_BACKEND
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import functools
+import threading
+import asyncio
+import time
+import hashlib
 import json
 import os
 
+# Path to knowledge_base.json in app/core/ (docker-compose mounts it so ops can edit it live)
+KB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core', 'knowledge_base.json')
+# Load the model + index in a background thread at app startup instead of on the first chat request
+WARMUP_ON_STARTUP = os.getenv("VECTOR_WARMUP_ON_STARTUP", "true").lower() == "true"
+# Seconds between checks of the KB file for edits (0 disables the watcher; /api/debug/reload-kb still works)
+KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "10"))
+
+# Persisted KB embeddings live next to knowledge_base.json so a restart can skip re-encoding.
+INDEX_DIR = os.getenv(
+    "VECTOR_INDEX_DIR",
+    os.path.join(os.path.dirname(KB_PATH), 'kb_index')
+)
+INDEX_VECTORS_FILE = "kb_vectors.npy"
+INDEX_MANIFEST_FILE = "manifest.json"
+# Bump when the on-disk vector layout changes (3 = L2-normalized float32 rows + per-row text hashes)
+INDEX_FORMAT = 3
+
+# Texts embedded per KB entry ('text', 'question_variant', 'keywords'). Each one gets its own
+# row; an entry scores as its best row, so customer questions can match stored question phrasings.
+EMBED_FIELDS = [f.strip() for f in os.getenv("VECTOR_EMBED_FIELDS", "text,question_variant").split(",") if f.strip()]
+
+# Query embedding cache (customers repeat the same few questions); TTL in seconds, 0 = no expiry
+QUERY_CACHE_SIZE = int(os.getenv("VECTOR_QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("VECTOR_QUERY_CACHE_TTL", "0"))
+
+# Threads running searches off the event loop (async chat path). With batching on they mostly
+# wait on the batcher, so more of them means more concurrent queries per encode batch.
+EMBED_WORKERS = int(os.getenv("VECTOR_EMBED_WORKERS", "8" if BATCHING_ENABLED else "2"))
+
+# Hybrid search: fusion of semantic (cosine) scores with BM25 lexical scores
+# - 'weighted': cosine + VECTOR_LEXICAL_WEIGHT * normalized BM25 (stays on the cosine scale)
+# - 'rrf':      reciprocal-rank fusion decides the order; matches report their cosine score
+FUSION = os.getenv("VECTOR_FUSION", "weighted")
+LEXICAL_WEIGHT = float(os.getenv("VECTOR_LEXICAL_WEIGHT", "0.15"))
+RRF_K = int(os.getenv("VECTOR_RRF_K", "60"))
+# Length of each retriever's ranked list: RRF only counts votes from the top FUSION_DEPTH,
+# and ANN backends rescore the lexical top FUSION_DEPTH alongside their own candidates
+FUSION_DEPTH = 20
+
+# Metadata fields searches can be filtered on, and how many filtered sub-indexes to keep built
+FILTER_FIELDS = ("category", "subcategory", "intent")
+PARTITION_CACHE_SIZE = int(os.getenv("VECTOR_PARTITION_CACHE_SIZE", "32"))
+
+# e.g. {"category": {"support", "commercial"}, "intent": "support"}: OR within a field, AND across
+SearchFilters = Dict[str, str | Iterable[str]]
+
+
+def SentenceTransformer(model_name: str):
+    """Imported on first use, so the ONNX embedding backend never loads PyTorch."""
+    from sentence_transformers import SentenceTransformer as _SentenceTransformer
+    return _SentenceTransformer(model_name)
+
+
+def doc_views(doc: Dict[str, Any], fields: List[str] = EMBED_FIELDS) -> List[Tuple[str, str]]:
+    """(field, text) pairs embedded for a KB entry. Always includes the answer text."""
+    views = []
+    for field in fields:
+        if field == "keywords":
+            value = ", ".join(doc.get("keywords", []))
+        else:
+            value = doc.get(field)
+        if isinstance(value, str) and value.strip():
+            views.append((field, value))
+    if not any(field == "text" for field, _ in views):
+        views.insert(0, ("text", doc.get("text", "")))
+    return views
+
+
+class KBIndex:
+    """
+    Snapshot of everything a search reads: docs, vectors, BM25 lexical index and ANN index.
+    A reload builds a new snapshot and swaps it in with a single assignment, so in-flight
+    searches finish on the snapshot they started with and never see a half-built matrix.
+
+    `store` is what searches score against (float32 / float16 / int8, see VECTOR_STORAGE).
+    `vectors` keeps the float32 matrix only in float32 mode; quantized modes drop it to save memory.
+
+    Rows are the embedded views of each entry (see doc_views), grouped by entry: the rows of
+    docs[i] are row_ptr[i]:row_ptr[i + 1]. Semantic scores are max-pooled back to entries.
+    """
+
+    def __init__(self, docs: List[Dict[str, Any]], vectors: np.ndarray | QuantizedVectors,
+                 row_hashes: List[str], kb_hash: str, storage: str = VECTOR_STORAGE,
+                 lexical: BM25Index | None = None, ann_backend: str = ANN_BACKEND):
+        self.docs = docs
+        self.row_hashes = row_hashes
+        self.kb_hash = kb_hash
+        if isinstance(vectors, QuantizedVectors) and vectors.mode == storage:
+            self.store = vectors
+        else:
+            self.store = QuantizedVectors(vectors if isinstance(vectors, np.ndarray) else vectors[:], storage)
+        self.vectors = self.store.data if self.store.mode == "float32" else None
+
+        views = [doc_views(doc) for doc in docs]
+        self.row_fields = [field for doc in views for field, _ in doc]
+        self.row_ptr = np.zeros(len(docs) + 1, dtype=np.int64)
+        np.cumsum([len(doc) for doc in views], out=self.row_ptr[1:])
+        self.row_doc = np.repeat(np.arange(len(docs)), np.diff(self.row_ptr))
+        if self.row_ptr[-1] != len(self.store):
+            raise ValueError(f"KB index has {len(self.store)} vectors for {self.row_ptr[-1]} embedded views")
+        self.max_views = int(np.diff(self.row_ptr).max()) if docs else 1
+
+        self.lexical = lexical if lexical is not None else BM25Index(docs)
+        # Nearest-neighbour backend over rows (exact scan for small KBs, IVF for large ones)
+        self.ann = build_index(self.store, ann_backend)
+
+        # Per filter field: value -> code, and one code per doc (np.isin gives a doc bitmap)
+        self.filter_values: Dict[str, Dict[Any, int]] = {}
+        self.filter_codes: Dict[str, np.ndarray] = {}
+        for field in FILTER_FIELDS:
+            values = self.filter_values[field] = {}
+            self.filter_codes[field] = np.fromiter(
+                (values.setdefault(doc.get(field), len(values)) for doc in docs), dtype=np.int32, count=len(docs)
+            )
+        self._partitions = LRUCache(PARTITION_CACHE_SIZE)
+
+    def pool(self, row_scores: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Max-pools per-row scores (n_queries, n_rows) to per-entry scores (n_queries, n_docs)."""
+        if len(self.docs) == len(self.store):
+            return row_scores
+        return np.maximum.reduceat(row_scores, self.row_ptr[:-1], axis=1, out=out)
+
+    def rows_of(self, doc_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids of the given docs (grouped per doc) and the number of rows of each doc."""
+        starts, stops = self.row_ptr[doc_ids], self.row_ptr[doc_ids + 1]
+        sizes = stops - starts
+        rows = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(int(sizes.sum()))
+        return rows, sizes
+
+    def doc_scores(self, doc_ids: np.ndarray, query_vec: np.ndarray) -> np.ndarray:
+        """Exact max-pooled cosine of one query against a subset of entries."""
+        rows, sizes = self.rows_of(doc_ids)
+        local_ptr = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        return np.maximum.reduceat(self.store[rows] @ query_vec, local_ptr)
+
+    def filter_mask(self, filters: SearchFilters) -> np.ndarray:
+        """Bitmap of docs matching every filter field (any of the listed values per field)."""
+        mask = np.ones(len(self.docs), dtype=bool)
+        for field, wanted in filters.items():
+            if field not in self.filter_codes:
+                raise ValueError(f"Unsupported search filter '{field}' (supported: {', '.join(FILTER_FIELDS)})")
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            codes = [self.filter_values[field][v] for v in wanted if v in self.filter_values[field]]
+            mask &= np.isin(self.filter_codes[field], codes)
+        return mask
+
+    def partition(self, filters: SearchFilters) -> "KBIndex":
+        """
+        Sub-index holding only the docs matching `filters`, with its own contiguous matrix, so a
+        filtered search scores just those rows (BM25 keeps the whole-KB statistics, so scores don't
+        depend on the filter). Built on first use and cached per filter combination on this
+        snapshot (a KB reload starts with an empty cache).
+
+        Partitions are always scanned exactly: building one runs on the request path, so it must
+        stay a row gather, never IVF k-means training.
+        """
+        key = tuple(sorted(
+            (field, (wanted,) if isinstance(wanted, str) else tuple(sorted(wanted)))
+            for field, wanted in filters.items()
+        ))
+        partition = self._partitions.get(key)
+        if partition is None:
+            doc_ids = np.flatnonzero(self.filter_mask(filters))
+            rows, _ = self.rows_of(doc_ids)
+            partition = KBIndex(
+                [self.docs[i] for i in doc_ids], self.store[rows],
+                [self.row_hashes[r] for r in rows], self.kb_hash, storage=self.store.mode,
+                lexical=self.lexical.subset(doc_ids), ann_backend="exact"
+            )
+            self._partitions.set(key, partition)
+        return partition
+
+
 class VectorService:
     _model = None
+    _model_name = None
+    _embedding_backend = None
+    _index: KBIndex | None = None
+
+    # Mirrors of the current snapshot for debug tooling (searches read _index).
+    # _kb_vectors is the float32 matrix, None when VECTOR_STORAGE is quantized.
     _kb_vectors = None
     _kb_data = []
 
+    # Single-flight guard: exactly one thread loads the model/index, concurrent callers wait on it
+    _init_lock = threading.Lock()
+
+    # Warm-up state: 'cold' -> 'warming' -> 'warm' (or 'error')
+    _warmup_state = "cold"
+    _warmup_error = None
+
+    # Hot reload state
+    _reload_lock = threading.Lock()
+    _kb_mtime = None
+    _watcher = None
+
+    # Normalized query text -> L2-normalized embedding
+    _query_cache = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+    _encode_seconds = 0.0
+    _encoded_queries = 0
+
+    # Micro-batches query encodes from concurrent chats (None when VECTOR_BATCHING=false)
+    _batcher = None
+
+    # Executor for asearch_many() (encoding + scoring are CPU-bound)
+    _executor = ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="vector-search")
+
+    # Per-thread score buffer reused by single-query searches (no per-query allocation)
+    _buffers = threading.local()
+
+    @staticmethod
+    def _read_kb() -> List[Dict[str, Any]]:
+        """Read knowledge_base.json (raises on invalid JSON)."""
+        if not os.path.exists(KB_PATH):
+            print(f"⚠️ Warning: knowledge_base.json not found at {KB_PATH}. Using empty KB.")
+            return []
+        with open(KB_PATH, 'r', encoding='utf-8') as f:
+            docs = json.load(f)
+        print(f"📚 Loaded {len(docs)} FAQs from knowledge_base.json")
+        return docs
+
     @classmethod
-    def load_kb(cls):
+    def load_kb(cls) -> List[Dict[str, Any]]:
         """Load Knowledge Base from JSON file."""
         try:
-            # Path to knowledge_base.json in app/core/
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            kb_path = os.path.join(base_dir, 'core', 'knowledge_base.json')
-            
-            if os.path.exists(kb_path):
-                with open(kb_path, 'r', encoding='utf-8') as f:
-                    cls._kb_data = json.load(f)
-                print(f"📚 Loaded {len(cls._kb_data)} FAQs from knowledge_base.json")
-            else:
-                print(f"⚠️ Warning: knowledge_base.json not found at {kb_path}. Using empty KB.")
-                cls._kb_data = []
+            return cls._read_kb()
         except Exception as e:
             print(f"❌ Error loading KB: {e}")
-            cls._kb_data = []
+            return []
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows into a contiguous float32 array, so cosine similarity is a plain dot product."""
+        vectors = np.array(vectors, dtype=np.float32, order='C', ndmin=2)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        return vectors
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        """Per-entry hash of the embedded text, used to reuse vectors of unchanged entries."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _kb_hash(row_hashes: List[str]) -> str:
+        """Content hash of the texts we embed (edits to non-embedded fields don't force a re-encode)."""
+        return hashlib.sha256("\0".join(row_hashes).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _load_index(cls, dim: int) -> Tuple[np.ndarray, List[str], str] | None:
+        """
+        Return (vectors memory-mapped, row hashes, kb hash) of the persisted index if it was built
+        with the current model, else None. Rows can be reused even when the KB has changed since.
+        """
+        manifest_path = os.path.join(INDEX_DIR, INDEX_MANIFEST_FILE)
+        vectors_path = os.path.join(INDEX_DIR, INDEX_VECTORS_FILE)
+        if not (os.path.exists(manifest_path) and os.path.exists(vectors_path)):
+            return None
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            if (manifest.get("format") != INDEX_FORMAT
+                    or manifest.get("model") != cls._model_name
+                    or manifest.get("dim") != dim):
+                print("♻️ KB index is stale (format or EMBEDDING_MODEL changed). Rebuilding...")
+                return None
+
+            vectors = np.load(vectors_path, mmap_mode='r')
+            row_hashes = manifest.get("row_hashes", [])
+            if vectors.dtype != np.float32 or vectors.shape != (len(row_hashes), dim):
+                print("♻️ KB index shape mismatch. Rebuilding...")
+                return None
+            return vectors, row_hashes, manifest.get("kb_hash")
+        except Exception as e:
+            print(f"⚠️ Could not load KB index: {e}. Rebuilding...")
+            return None
+
+    @classmethod
+    def _save_index(cls, vectors: np.ndarray, row_hashes: List[str], kb_hash: str):
+        """Persist KB vectors + manifest atomically (write to temp files, then rename)."""
+        try:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            vectors_path = os.path.join(INDEX_DIR, INDEX_VECTORS_FILE)
+            manifest_path = os.path.join(INDEX_DIR, INDEX_MANIFEST_FILE)
+
+            tmp_vectors = vectors_path + ".tmp"
+            with open(tmp_vectors, 'wb') as f:
+                np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+
+            tmp_manifest = manifest_path + ".tmp"
+            with open(tmp_manifest, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "format": INDEX_FORMAT,
+                    "kb_hash": kb_hash,
+                    "model": cls._model_name,
+                    "dim": int(vectors.shape[1]),
+                    "count": int(vectors.shape[0]),
+                    "dtype": "float32",
+                    "row_hashes": row_hashes
+                }, f)
+
+            # Vectors first: a crash in between leaves an old manifest that no longer matches.
+            os.replace(tmp_vectors, vectors_path)
+            os.replace(tmp_manifest, manifest_path)
+            print(f"💾 KB index saved to {INDEX_DIR}")
+        except Exception as e:
+            print(f"⚠️ Could not save KB index: {e}")
+
+    @classmethod
+    def _embed_kb(cls, model, docs: List[Dict[str, Any]], row_hashes: List[str],
+                  previous: Tuple[np.ndarray, List[str], str] | None) -> Tuple[np.ndarray, int]:
+        """
+        Build the KB matrix, copying rows of unchanged texts from `previous` (vectors, row hashes)
+        and encoding only added/changed views in one batch. Returns (vectors, encoded count).
+        """
+        dim = model.get_sentence_embedding_dimension()
+        texts = [text for doc in docs for _, text in doc_views(doc)]
+        vectors = np.empty((len(texts), dim), dtype=np.float32)
+
+        previous_rows = {}
+        if previous is not None:
+            previous_rows = {h: row for row, h in enumerate(previous[1])}
+
+        reuse = [(row, previous_rows[h]) for row, h in enumerate(row_hashes) if h in previous_rows]
+        if reuse:
+            new_rows, old_rows = (np.array(rows, dtype=np.int64) for rows in zip(*reuse))
+            vectors[new_rows] = previous[0][old_rows]
+
+        missing = [row for row, h in enumerate(row_hashes) if h not in previous_rows]
+        if missing:
+            vectors[missing] = cls._normalize(model.encode([texts[row] for row in missing]))
+
+        return vectors, len(missing)
+
+    @classmethod
+    def _rebuild_index(cls, model) -> Dict[str, Any]:
+        """
+        (Re)load knowledge_base.json and swap in a new KBIndex, re-embedding only views (answer,
+        question phrasing, ...) whose text is new or changed. Keeps serving the current index if the file is mid-edit/invalid.
+        """
+        with cls._reload_lock:
+            mtime = os.path.getmtime(KB_PATH) if os.path.exists(KB_PATH) else None
+            current = cls._index
+
+            try:
+                docs = cls._read_kb()
+            except Exception as e:
+                print(f"❌ Error loading KB: {e}")
+                if current is not None:
+                    # Don't retry until the file changes again
+                    cls._kb_mtime = mtime
+                    return {"status": "error", "error": str(e), "total": len(current.docs)}
+                docs = []
+
+            row_hashes = [cls._text_hash(text) for doc in docs for _, text in doc_views(doc)]
+            kb_hash = cls._kb_hash(row_hashes)
+
+            if current is not None and current.kb_hash == kb_hash and current.docs == docs:
+                cls._kb_mtime = mtime
+                return {"status": "unchanged", "total": len(docs), "encoded": 0}
+
+            # Reuse vectors from the live float32 index, else from the persisted (float32) one,
+            # else dequantized from the live quantized store
+            previous = None
+            if current is not None and current.vectors is not None:
+                previous = (current.vectors, current.row_hashes, current.kb_hash)
+            if previous is None:
+                previous = cls._load_index(model.get_sentence_embedding_dimension())
+            if previous is None and current is not None:
+                previous = (current.store, current.row_hashes, current.kb_hash)
+            lossy = previous is not None and isinstance(previous[0], QuantizedVectors)
+
+            if previous is not None and previous[2] == kb_hash:
+                vectors, encoded = previous[0], 0
+            else:
+                vectors, encoded = cls._embed_kb(model, docs, row_hashes, previous)
+                # Only float32 rows straight from the encoder go to disk: dequantized rows would
+                # make the persisted index (and every later reuse of it) lossy
+                if docs and lossy and encoded < len(row_hashes):
+                    print("💾 KB index not saved: reused rows were dequantized from the live store.")
+                elif docs:
+                    cls._save_index(vectors, row_hashes, kb_hash)
+
+            index = KBIndex(docs, vectors, row_hashes, kb_hash)
+
+            # Atomic swap: searches grab cls._index once and keep using that snapshot
+            cls._index = index
+            cls._kb_data = docs
+            cls._kb_vectors = index.vectors
+            cls._kb_mtime = mtime
+
+            if not docs:
+                print("⚠️ Knowledge Base is empty. No vectors indexed.")
+            elif encoded:
+                print(f"✅ {len(docs)} FAQs Indexed as {len(row_hashes)} vectors ({encoded} embedded, {len(row_hashes) - encoded} reused).")
+            else:
+                print(f"⚡ {len(docs)} FAQs loaded from index.")
+            print(f"🧭 Vector search backend: {index.ann.name} ({index.store.mode}, {index.store.nbytes / 1e6:.1f} MB)")
+
+            return {"status": "reloaded", "total": len(docs), "vectors": len(row_hashes),
+                    "encoded": encoded, "reused": len(row_hashes) - encoded}
+
+    @classmethod
+    def reload_kb(cls) -> Dict[str, Any]:
+        """Pick up edits to knowledge_base.json without a restart (admin endpoint / file watcher)."""
+        model = cls.get_model()
+        return cls._rebuild_index(model)
+
+    @classmethod
+    def _watch_kb(cls):
+        """Poll the KB file's mtime and hot-reload on change."""
+        while True:
+            time.sleep(KB_RELOAD_INTERVAL)
+            try:
+                mtime = os.path.getmtime(KB_PATH) if os.path.exists(KB_PATH) else None
+                if mtime != cls._kb_mtime:
+                    print("🔄 knowledge_base.json changed. Reloading...")
+                    cls._rebuild_index(cls._model)
+            except Exception as e:
+                print(f"⚠️ KB watcher error: {e}")
+
+    @classmethod
+    def start_kb_watcher(cls):
+        if KB_RELOAD_INTERVAL <= 0 or cls._watcher is not None:
+            return
+        cls._watcher = threading.Thread(target=cls._watch_kb, name="kb-watcher", daemon=True)
+        cls._watcher.start()
+
+    @classmethod
+    def warm_up(cls):
+        """Load the model and build/load the KB index (runs in a background thread at startup)."""
+        cls._warmup_state = "warming"
+        start = time.perf_counter()
+        try:
+            cls.get_model()
+            cls._warmup_state = "warm"
+            print(f"🔥 Vector service warm in {time.perf_counter() - start:.1f}s.")
+        except Exception as e:
+            cls._warmup_state = "error"
+            cls._warmup_error = str(e)
+            print(f"❌ Vector service warm-up failed: {e}")
+
+    @classmethod
+    def start_warmup(cls):
+        """Kick off warm_up() without blocking app startup."""
+        if not WARMUP_ON_STARTUP or cls._model is not None:
+            return
+        threading.Thread(target=cls.warm_up, name="vector-warmup", daemon=True).start()
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Readiness info: warm/cold state, model and index size."""
+        index = cls._index
+        # A request may have loaded the model lazily before (or without) warm_up()
+        state = "warm" if cls._model is not None and index is not None else cls._warmup_state
+        return {
+            "state": state,
+            "ready": state == "warm",
+            "model": cls._model_name,
+            "embedding_backend": cls._embedding_backend or EMBEDDING_BACKEND,
+            "index_size": len(index.docs) if index is not None else 0,
+            "backend": index.ann.name if index is not None else None,
+            "storage": index.store.mode if index is not None else None,
+            "index_mb": round(index.store.nbytes / 1e6, 2) if index is not None else 0,
+            "error": cls._warmup_error
+        }
+
+    @classmethod
+    def _load_embedder(cls, model_name: str):
+        """
+        sentence-transformers (PyTorch) or onnxruntime encoder per EMBEDDING_BACKEND.
+        'onnx' vectors match PyTorch, so the persisted index is shared; 'onnx-int8' vectors drift
+        slightly, so it gets its own index (the manifest model name carries the backend).
+        """
+        if EMBEDDING_BACKEND in ("onnx", "onnx-int8"):
+            try:
+                model = OnnxEmbedder(model_name, quantize=EMBEDDING_BACKEND == "onnx-int8")
+                cls._model_name = model_name if EMBEDDING_BACKEND == "onnx" else f"{model_name}#onnx-int8"
+                cls._embedding_backend = EMBEDDING_BACKEND
+                return model
+            except ImportError as e:
+                print(f"⚠️ ONNX backend unavailable ({e}). Install onnxruntime + onnx. Using PyTorch.")
+            except Exception as e:
+                print(f"⚠️ ONNX backend failed to load ({e}). Using PyTorch.")
+        elif EMBEDDING_BACKEND != "torch":
+            print(f"⚠️ Unknown EMBEDDING_BACKEND '{EMBEDDING_BACKEND}'. Using PyTorch.")
+
+        cls._model_name = model_name
+        cls._embedding_backend = "torch"
+        return SentenceTransformer(model_name)
 
     @classmethod
     def get_model(cls):
         """Lazy load the model to avoid heavy startup if not used."""
-        if cls._model is None:
-            # 1. Load Data
-            cls.load_kb()
-            
+        if cls._model is not None:
+            return cls._model
+
+        with cls._init_lock:
+            # Another thread may have finished loading while we waited for the lock
+            if cls._model is not None:
+                return cls._model
+
             # Model Selection for Free Tier Deployment:
             # - 'all-MiniLM-L6-v2': Lightweight (80MB), Fast, Good for Demo (Free Servers)
             # - 'thenlper/gte-large': Production Grade (1GB+), High Memory
             
             # Using MiniLM for lighter footprint on free Render/Railway instances
             model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
-            print(f"⏳ Loading AI Model ({model_name})...")
-            cls._model = SentenceTransformer(model_name)
+            print(f"⏳ Loading AI Model ({model_name}, {EMBEDDING_BACKEND})...")
+            model = cls._load_embedder(model_name)
             
-            # 2. Index the Knowledge Base
-            if cls._kb_data:
-                texts = [doc['text'] for doc in cls._kb_data]
-                cls._kb_vectors = cls._model.encode(texts)
-                print(f"✅ AI Model Loaded & {len(cls._kb_data)} FAQs Indexed.")
-            else:
-                print("⚠️ Knowledge Base is empty. No vectors indexed.")
-                cls._kb_vectors = np.array([])
+            # Load Data & Index the Knowledge Base (reuse the on-disk index when it matches)
+            cls._rebuild_index(model)
+            if BATCHING_ENABLED:
+                cls._batcher = EmbeddingBatcher(lambda texts: cls._normalize(model.encode(texts)))
+            cls._model = model
+            print("✅ AI Model Loaded.")
+            cls.start_kb_watcher()
                 
         return cls._model
 
+    @staticmethod
+    def _query_key(query: str) -> str:
+        """Cache key: lowercased, whitespace-collapsed query text."""
+        return " ".join(query.lower().split())
+
     @classmethod
-    def search(cls, query: str, threshold: float = 0.35) -> Dict[str, Any] | None:
+    def _encode_queries(cls, queries: List[str]) -> np.ndarray:
+        """
+        Encodes queries L2-normalized, serving repeats from the LRU cache.
+        Cache misses are encoded together in one model batch, shared with other
+        concurrent callers through the embedding batcher when it is enabled.
+        The normalized key only decides cache hits: the model always sees the
+        first original text that maps to a key (casing is kept for cased models).
+        """
+        model = cls.get_model()
+        keys = [cls._query_key(q) for q in queries]
+        originals = {}
+        for key, query in zip(keys, queries):
+            originals.setdefault(key, query)
+
+        cached = {}
+        for key in originals:
+            vector = cls._query_cache.get(key)
+            if vector is not None:
+                cached[key] = vector
+
+        missing = [key for key in originals if key not in cached]
+        if missing:
+            texts = [originals[key] for key in missing]
+            start = time.perf_counter()
+            if cls._batcher is not None:
+                vectors = cls._batcher.encode(texts)
+            else:
+                vectors = cls._normalize(model.encode(texts))
+            cls._encode_seconds += time.perf_counter() - start
+            cls._encoded_queries += len(missing)
+
+            for key, vector in zip(missing, vectors):
+                vector = vector.copy()
+                vector.setflags(write=False)
+                cls._query_cache.set(key, vector)
+                cached[key] = vector
+
+        return np.stack([cached[key] for key in keys])
+
+    @classmethod
+    async def aembed_queries(cls, queries: List[str]) -> np.ndarray:
+        """L2-normalized query embeddings on the vector executor (cache hits after a search)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._executor, cls._encode_queries, queries)
+
+    @classmethod
+    def kb_version(cls) -> str | None:
+        """Content hash of the KB texts currently served (changes whenever an embedded text changes)."""
+        index = cls._index
+        return index.kb_hash if index is not None else None
+
+    @classmethod
+    def query_cache_stats(cls) -> Dict[str, Any]:
+        """Hit/miss counters plus an estimate of encode time saved by the query cache."""
+        stats = cls._query_cache.stats()
+        avg_encode_ms = (cls._encode_seconds * 1000 / cls._encoded_queries) if cls._encoded_queries else 0.0
+        stats["avg_encode_ms"] = round(avg_encode_ms, 3)
+        stats["estimated_saved_ms"] = round(stats["hits"] * avg_encode_ms, 1)
+        return stats
+
+    @classmethod
+    def batching_stats(cls) -> Dict[str, Any]:
+        """Batch-size and queueing-delay metrics of the embedding batcher."""
+        if cls._batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **cls._batcher.stats()}
+
+    @classmethod
+    def _semantic_scores(cls, index: KBIndex, query_vecs: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of each query against every KB doc, shape (len(queries), len(KB)).
+        KB rows are pre-normalized, so this is one matrix product (then a max over each doc's rows).
+        """
+        store = index.store
+
+        if query_vecs.shape[0] > 1:
+            return index.pool(store.scores(query_vecs))
+
+        # Single query: matrix-vector product straight into this thread's reusable buffers
+        buffer = getattr(cls._buffers, "scores", None)
+        if buffer is None or buffer.shape[1] != len(store):
+            buffer = np.empty((1, len(store)), dtype=np.float32)
+            cls._buffers.scores = buffer
+        store.dot(query_vecs[0], out=buffer[0])
+        if len(index.docs) == len(store):
+            return buffer
+
+        pooled = getattr(cls._buffers, "doc_scores", None)
+        if pooled is None or pooled.shape[1] != len(index.docs):
+            pooled = np.empty((1, len(index.docs)), dtype=np.float32)
+            cls._buffers.doc_scores = pooled
+        return index.pool(buffer, out=pooled)
+
+    @staticmethod
+    def _ranks(scores: np.ndarray) -> np.ndarray:
+        """Row-wise 0-based rank of every column (0 = best score)."""
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.broadcast_to(np.arange(scores.shape[1]), order.shape), axis=1)
+        return ranks
+
+    @classmethod
+    def _fuse(cls, semantic: np.ndarray, lexical: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fuses semantic and normalized BM25 score matrices (same shape).
+        Returns (ranking scores, reported scores); 'weighted' fusion updates `semantic` in place.
+        """
+        if FUSION == "rrf":
+            semantic_ranks, lexical_ranks = cls._ranks(semantic), cls._ranks(lexical)
+            ranking = np.where(semantic_ranks < FUSION_DEPTH, 1.0 / (RRF_K + 1 + semantic_ranks), 0.0)
+            # Docs sharing no term with the query get no lexical vote
+            voted = (lexical_ranks < FUSION_DEPTH) & (lexical > 0)
+            ranking += np.where(voted, 1.0 / (RRF_K + 1 + lexical_ranks), 0.0)
+            # RRF ties are common (rank 2 in one list == rank 2 in the other): break them by cosine.
+            # Distinct RRF sums differ by ~1e-6 (K=60), far more than this term can move them.
+            ranking += 1e-9 * semantic
+            return ranking, semantic
+
+        semantic += LEXICAL_WEIGHT * lexical
+        return semantic, semantic
+
+    @classmethod
+    def score_many(cls, queries: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores a batch of queries against the whole KB (for debugging / offline evaluation).
+        Returns (semantic, hybrid) score matrices of shape (len(queries), len(KB)).
+        """
+        cls.get_model()
+        index = cls._index
+        similarities = np.array(cls._semantic_scores(index, cls._encode_queries(queries)))
+        hybrid_scores, _ = cls._fuse(similarities.copy(), index.lexical.scores(queries, normalize=True))
+        return similarities, hybrid_scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Row-wise indices of the k best scores, best first (argpartition, then sort only k)."""
+        n_docs = scores.shape[1]
+        if k == 1:
+            # Same tie-breaking as a plain argmax (first index wins)
+            return np.argmax(scores, axis=1)[:, None]
+        if k >= n_docs:
+            candidates = np.tile(np.arange(n_docs), (scores.shape[0], 1))
+        else:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1)
+
+    @classmethod
+    def search_many(cls, queries: List[str], k: int = 3, threshold: float = 0.35,
+                    filters: SearchFilters | None = None) -> List[List[Dict[str, Any]]]:
+        """
+        Batched Hybrid Search: returns, per query, up to k {"doc", "score"} matches (best first)
+        scoring at or above the threshold. `filters` restricts the search to docs with matching
+        metadata (e.g. {"category": {"support", "commercial"}}); only those rows are scored.
+        """
+        cls.get_model()
+        # One snapshot for the whole call (a hot reload may swap cls._index meanwhile)
+        index = cls._index
+        if filters:
+            index = index.partition(filters)
+
+        if not queries or not index.docs or k <= 0:
+            return [[] for _ in queries]
+
+        k = min(k, len(index.docs))
+        query_vecs = cls._encode_queries(queries)
+
+        lexical = index.lexical.scores(queries, normalize=True)
+
+        if index.ann.name == "exact":
+            # 1. Vector Search + 2. BM25 fusion (weighted mode works in place, no extra copy)
+            ranking, reported = cls._fuse(cls._semantic_scores(index, query_vecs), lexical)
+            top_idx = cls._top_k(ranking, k)
+            ranked = [(indices, reported[row, indices]) for row, indices in enumerate(top_idx)]
+        else:
+            ranked = cls._ann_ranked(index, query_vecs, lexical, k)
+
+        results = []
+        for indices, scores in ranked:
+            # Filter rather than stop at the first low score: RRF order is not score order
+            results.append([
+                {"doc": index.docs[idx], "score": float(score)}
+                for idx, score in zip(indices, scores) if score >= threshold
+            ])
+        return results
+
+    @classmethod
+    def _ann_ranked(cls, index: KBIndex, query_vecs: np.ndarray, lexical: np.ndarray,
+                    k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Hybrid top-k through the ANN index: the ANN top-k plus the best lexical matches
+        are rescored exactly and fused. A doc with no lexical score can only make the
+        hybrid top-k through its semantic score, so nothing is lost beyond the ANN's
+        own recall and the FUSION_DEPTH cut-off. RRF needs the semantic top FUSION_DEPTH
+        to rank candidates the way an exact scan would.
+        """
+        n_docs = max(k, FUSION_DEPTH) if FUSION == "rrf" else k
+        # The ANN returns rows; fetch enough that n_docs distinct entries survive de-duplication
+        ann_rows, _ = index.ann.search(query_vecs, n_docs * index.max_views)
+
+        ranked = []
+        for row in range(query_vecs.shape[0]):
+            ann_docs = index.row_doc[ann_rows[row][ann_rows[row] >= 0]]
+            lexical_ids = np.flatnonzero(lexical[row])
+            if lexical_ids.shape[0] > FUSION_DEPTH:
+                best = np.argpartition(-lexical[row, lexical_ids], FUSION_DEPTH - 1)[:FUSION_DEPTH]
+                lexical_ids = lexical_ids[best]
+            candidates = np.union1d(ann_docs, lexical_ids)
+            if candidates.shape[0] == 0:
+                ranked.append((candidates, np.zeros(0, dtype=np.float32)))
+                continue
+
+            semantic = index.doc_scores(candidates, query_vecs[row])[None, :]
+            ranking, reported = cls._fuse(semantic, lexical[row, candidates][None, :])
+            top = cls._top_k(ranking, min(k, candidates.shape[0]))[0]
+            ranked.append((candidates[top], reported[0, top]))
+        return ranked
+
+    @classmethod
+    async def asearch_many(cls, queries: List[str], k: int = 3, threshold: float = 0.35,
+                           filters: SearchFilters | None = None) -> List[List[Dict[str, Any]]]:
+        """search_many() on the vector executor, so the event loop keeps serving other chats."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            cls._executor, functools.partial(cls.search_many, queries, k, threshold, filters)
+        )
+
+    @classmethod
+    def search(cls, query: str, threshold: float = 0.35,
+               filters: SearchFilters | None = None) -> Dict[str, Any] | None:
         """
         Performs Hybrid Search:
         1. Semantic Search (Vector Cosine Similarity)
-        2. Keyword Boosting (+0.15 score if keywords match)
+        2. BM25 lexical scores over text, keywords and question phrasings, fused per VECTOR_FUSION
+        Optionally restricted to docs matching `filters` (category / subcategory / intent).
         """
-        model = cls.get_model()
-        
-        if not cls._kb_data:
-            return None
-        
-        # 1. Vector Search
-        query_vec = model.encode([query])
-        similarities = cosine_similarity(query_vec, cls._kb_vectors)[0]
-        
-        # 2. Keyword Boosting Logic
-        query_lower = query.lower()
-        boosted_scores = similarities.copy()
-        
-        for idx, doc in enumerate(cls._kb_data):
-            keywords = doc.get("keywords", [])
-            # If ANY keyword exists in the query, boost the score
-            if any(k.lower() in query_lower for k in keywords):
-                # Apply a significant boost for keyword matches
-                # This helps resolving specific technical errors code or product names
-                boosted_scores[idx] += 0.15
-        
-        # 3. Find Best Match
-        best_idx = np.argmax(boosted_scores)
-        best_score = boosted_scores[best_idx]
-        
-        # doc = cls._kb_data[best_idx]
-        # print(f"🔍 Hybrid Search: '{query}' -> Match: '{doc['text'][:30]}...' (Score: {best_score:.4f})")
-        
-        if best_score >= threshold:
-            return {
-                "doc": cls._kb_data[best_idx],
-                "score": float(best_score)
-            }
-        
-        return None
+        matches = cls.search_many([query], k=1, threshold=threshold, filters=filters)[0]
+        return matches[0] if matches else None
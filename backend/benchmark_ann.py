@@ -0,0 +1,91 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.ann_index import ExactIndex, IVFIndex
+
+# Usage: python benchmark_ann.py [sizes...]   e.g. python benchmark_ann.py 10000 100000
+SIZES = [int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+DIM = int(os.getenv("BENCH_DIM", "384"))          # all-MiniLM-L6-v2 dimension
+N_QUERIES = int(os.getenv("BENCH_QUERIES", "200"))
+# Topic centres in the synthetic KB (0 = one per 200 vectors). The default gets easier as the KB
+# grows (at 1M there are about as many topics as IVF cells); a fixed count keeps topics spread
+# over many cells, closer to a large KB that keeps covering the same subjects.
+N_TOPICS = int(os.getenv("BENCH_TOPICS", "0"))
+NPROBES = [1, 4, 16, 64]
+
+
+def topic_vectors(topics: np.ndarray, n: int, rng) -> np.ndarray:
+    """Unit vectors scattered around random topic centres."""
+    vectors = topics[rng.integers(0, topics.shape[0], size=n)]
+    vectors += 0.6 * rng.standard_normal(vectors.shape, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def synthetic_kb(n: int, dim: int, rng) -> tuple:
+    """
+    Clustered unit vectors (FAQ embeddings group by topic, unlike uniform noise).
+    Returns (vectors, topic centres).
+    """
+    n_topics = N_TOPICS or max(8, n // 200)
+    topics = rng.standard_normal((n_topics, dim), dtype=np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    # Chunked so 1M x 384 stays at ~1.5GB peak
+    for start in range(0, n, 100_000):
+        chunk = topic_vectors(topics, min(100_000, n - start), rng)
+        vectors[start:start + chunk.shape[0]] = chunk
+    return vectors, topics
+
+
+def held_out_queries(topics: np.ndarray, n: int, rng) -> np.ndarray:
+    """
+    Queries drawn from the same topic distribution as the KB but never stored in it,
+    so their nearest neighbour is not a near-copy of themselves (which every cell probe finds).
+    """
+    return topic_vectors(topics, n, rng)
+
+
+def timed_search(index, queries: np.ndarray, k: int = 1):
+    """Per-query search (how chat traffic hits the index). Returns (ids, ms per query)."""
+    start = time.perf_counter()
+    ids = np.vstack([index.search(q[None, :], k)[0] for q in queries])
+    elapsed_ms = (time.perf_counter() - start) * 1000 / queries.shape[0]
+    return ids, elapsed_ms
+
+
+def benchmark():
+    print("\n🧪 ANN INDEX BENCHMARK (recall@1 / @10 vs exact search, held-out queries)")
+    print("=" * 80)
+    print(f"Dim: {DIM} | Queries per size: {N_QUERIES} | Topics: {N_TOPICS or 'n / 200'} | nprobe sweep: {NPROBES}")
+    print("=" * 80)
+
+    rng = np.random.default_rng(0)
+
+    for n in SIZES:
+        kb, topics = synthetic_kb(n, DIM, rng)
+        queries = held_out_queries(topics, N_QUERIES, rng)
+
+        exact_ids, exact_ms = timed_search(ExactIndex(kb), queries, k=10)
+
+        start = time.perf_counter()
+        ivf = IVFIndex(kb)
+        build_s = time.perf_counter() - start
+
+        print(f"\n📦 {n:,} vectors | exact: {exact_ms:.2f} ms/query | IVF nlist={ivf.nlist} built in {build_s:.1f}s")
+        for nprobe in NPROBES:
+            ivf.nprobe = min(nprobe, ivf.nlist)
+            ivf_ids, ivf_ms = timed_search(ivf, queries, k=10)
+            recall_1 = float(np.mean(ivf_ids[:, 0] == exact_ids[:, 0]))
+            recall_10 = float(np.mean([len(np.intersect1d(a, b)) / 10 for a, b in zip(ivf_ids, exact_ids)]))
+            print(f"   nprobe={ivf.nprobe:<4} recall@1: {recall_1:.3f} | recall@10: {recall_10:.3f} | "
+                  f"{ivf_ms:.2f} ms/query | speedup: {exact_ms / ivf_ms:.1f}x")
+
+        del kb, ivf
+        print("-" * 80)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,64 @@
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.vector_service import VectorService
+from app.services.embedding_batcher import EmbeddingBatcher
+
+CONCURRENCY_LEVELS = [1, 4, 8, 16, 32]
+QUERIES_PER_CLIENT = 20
+
+
+def run_clients(encode, queries, n_clients):
+    """n_clients threads each encode QUERIES_PER_CLIENT single queries back to back. Returns queries/sec."""
+    barrier = threading.Barrier(n_clients + 1)
+
+    def client(offset):
+        barrier.wait()
+        for i in range(QUERIES_PER_CLIENT):
+            encode([queries[(offset + i) % len(queries)]])
+
+    threads = [threading.Thread(target=client, args=(c * QUERIES_PER_CLIENT,)) for c in range(n_clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return n_clients * QUERIES_PER_CLIENT / (time.perf_counter() - start)
+
+
+def benchmark_batching():
+    """
+    Query-encoding throughput of concurrent chats: one model.encode() per query
+    vs the micro-batcher. Bypasses the query cache (every query is encoded).
+    """
+    model = VectorService.get_model()
+    queries = [doc.get('question_variant') or doc['text'] for doc in VectorService._index.docs]
+
+    def unbatched(texts):
+        return VectorService._normalize(model.encode(texts))
+
+    print("\n🧪 QUERY EMBEDDING MICRO-BATCHING BENCHMARK")
+    print("=" * 80)
+    print(f"Model: {VectorService._model_name} | Queries per client: {QUERIES_PER_CLIENT}")
+    print("=" * 80)
+
+    for n_clients in CONCURRENCY_LEVELS:
+        batcher = EmbeddingBatcher(unbatched)
+        direct_qps = run_clients(unbatched, queries, n_clients)
+        batched_qps = run_clients(batcher.encode, queries, n_clients)
+        stats = batcher.stats()
+
+        print(f"\n👥 {n_clients} concurrent clients")
+        print(f"   Unbatched: {direct_qps:8.1f} queries/s")
+        print(f"   Batched:   {batched_qps:8.1f} queries/s ({batched_qps / direct_qps:.2f}x)")
+        print(f"   Avg batch: {stats['avg_batch_size']} | Avg queue delay: {stats['avg_queue_delay_ms']} ms "
+              f"| Max queue delay: {stats['max_queue_delay_ms']} ms")
+        print("-" * 80)
+
+
+if __name__ == "__main__":
+    benchmark_batching()
@@ -0,0 +1,129 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+from unittest import mock
+import numpy as np
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.llm_service as llm_service
+import app.services.ai_service as ai_service
+import app.services.fake_groq as fake_groq
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_gateway import LLMGateway
+from app.services.cache import LRUCache
+from app.services.fake_groq import FakeGroq
+from app.services.vector_service import VectorService, KB_PATH
+from app.services.ai_service import AIService
+import app.models.models  # noqa: F401  (registers the tables)
+
+# Fake Groq latency model (roughly llama-3.3-70b on Groq): lognormal time to first token,
+# plus prompt prefill and output decoding speeds
+LATENCY_MS = 250
+LATENCY_SIGMA = 0.35
+PREFILL_TOKENS_PER_S = 8000
+DECODE_TOKENS_PER_S = 250
+
+N_MESSAGES = 60
+CONCURRENCY = 8
+
+# The fake Groq escalates messages containing one of its ESCALATE_WORDS
+ESCALATIONS = [
+    "Our production site returns a 500 error on checkout since this morning, we are losing orders",
+    "The chatbot you trained for us keeps giving customers wrong prices, fix it urgently",
+    "I was charged twice for the Gold plan this month and nobody answers my emails",
+    "Our contact form is broken since your SEO changes, I need someone to look at it",
+]
+ANSWERS = [
+    "What are your working hours?",
+    "Can I pay via wire transfer?",
+    "Do you provide support after the website is launched?",
+    "How long does a corporate website take?",
+]
+
+
+async def run(messages, db_url):
+    with open(KB_PATH, 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+    matches = [{"doc": doc, "score": 0.6} for doc in docs[:AIService.RAG_CONTEXT_K]]
+
+    async def fake_search(queries, k=3, threshold=0.35, filters=None):
+        return [matches for _ in queries]
+
+    engine = create_async_engine(db_url)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i, message):
+        async with semaphore, AsyncSession(engine, expire_on_commit=False) as session:
+            start = time.perf_counter()
+            result = await AIService.process_message(message, f"bench-{i}", session)
+            return time.perf_counter() - start, result["action"]
+
+    # No embedding model here: canned KB matches and no semantic answer cache
+    with mock.patch.object(VectorService, "asearch_many", fake_search), \
+            mock.patch.object(ai_service, "ANSWER_CACHE_ENABLED", False):
+        results = await asyncio.gather(*(one(i, m) for i, m in enumerate(messages)))
+    await engine.dispose()
+    return results
+
+
+def measure(mode: str, messages, db_url):
+    calls, prompt, completion = LLMService._calls, LLMService._prompt_tokens, LLMService._completion_tokens
+    fake = FakeGroq(latency_ms=LATENCY_MS, latency_sigma=LATENCY_SIGMA, tokens_per_s=DECODE_TOKENS_PER_S,
+                    prefill_tokens_per_s=PREFILL_TOKENS_PER_S, error_rate=0, rate_limit_rate=0, seed=0)
+    # Own client, breaker, gateway and classification cache per run: nothing carries over between modes
+    with mock.patch.object(llm_service, "LLM_COMBINED_DECISION", mode == "combined"), \
+            mock.patch.object(LLMService, "_client", LLMService._build_client("fake", transport=fake.transport())), \
+            mock.patch.object(LLMService, "_breaker", CircuitBreaker()), \
+            mock.patch.object(LLMService, "_gateway", LLMGateway()), \
+            mock.patch.object(LLMService, "_classification_cache", LRUCache()), \
+            mock.patch.object(llm_service, "print", lambda *a, **k: None, create=True), \
+            mock.patch.object(fake_groq, "print", lambda *a, **k: None, create=True):
+        results = asyncio.run(run(messages, db_url))
+    latencies = np.array([t for t, _ in results]) * 1000
+    n = len(messages)
+    return {
+        "p50": np.percentile(latencies, 50), "p95": np.percentile(latencies, 95),
+        "calls": (LLMService._calls - calls) / n,
+        "prompt": (LLMService._prompt_tokens - prompt) / n,
+        "completion": (LLMService._completion_tokens - completion) / n,
+        "actions": sorted(set(a for _, a in results)),
+    }
+
+
+def benchmark_escalation():
+    """
+    Escalation (and plain answer) latency and token usage per message through
+    AIService.process_message: decision + separate classification call vs one combined call.
+    """
+    print("\n🧪 COMBINED DECISION + CLASSIFICATION BENCHMARK (app.services.fake_groq)")
+    print("=" * 80)
+    print(f"Messages per run: {N_MESSAGES} | Concurrency: {CONCURRENCY} | Fake latency: "
+          f"{LATENCY_MS} ms x lognormal({LATENCY_SIGMA}) + prefill {PREFILL_TOKENS_PER_S} tok/s "
+          f"+ decode {DECODE_TOKENS_PER_S} tok/s")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        SQLModel.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+        db_url = f"sqlite+aiosqlite:///{db_path}"
+
+        for label, pool in (("Escalations", ESCALATIONS), ("Answers", ANSWERS)):
+            # Distinct texts (order refs), so the classification cache can't serve repeats
+            messages = [f"{pool[i % len(pool)]} (order ref {i})" for i in range(N_MESSAGES)]
+            print(f"\n📝 {label}")
+            for mode in ("two-call", "combined"):
+                r = measure(mode, messages, db_url)
+                print(f"   {mode:<9} p50 {r['p50']:6.0f} ms | p95 {r['p95']:6.0f} ms | LLM calls {r['calls']:.1f} "
+                      f"| tokens in {r['prompt']:6.0f} / out {r['completion']:4.0f} | actions {r['actions']}")
+    print("-" * 80)
+
+
+if __name__ == "__main__":
+    benchmark_escalation()
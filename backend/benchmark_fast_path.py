@@ -0,0 +1,129 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.vector_service import VectorService, KBIndex
+from app.services.bm25_index import BM25Index
+from app.services.ai_service import AIService
+
+# Knowledge-type customer messages used by run_tests.py / test_scenarios.py / test_embedding.py
+CUSTOMER_MESSAGES = [
+    "I forgot my password, how can I reset it?",
+    "Where is ZEdny HQ located?",
+    "What are your working hours?",
+    "How long does a corporate website take?",
+    "Do you provide support after the project is live?",
+    "How long does it take to build a custom web app?",
+    "Do you provide support after the website is launched?",
+    "Can I pay via wire transfer?",
+    "I want my money back",
+    "Where is your office?",
+    "Reset my password",
+    "My server crashed with 500 error",
+    "How do I contact you?",
+]
+
+
+def fast_path_replies(index, row_scores, lexical, allowed_rows):
+    """
+    Top entry and its score per query, scoring each entry only on `allowed_rows`
+    (bool matrix n_queries x n_rows) and fusing with BM25 like the live search.
+    """
+    scores = np.where(allowed_rows, row_scores, -np.inf).astype(np.float32)
+    ranking, reported = VectorService._fuse(index.pool(scores), lexical)
+    top = ranking.argmax(axis=1)
+    return top, reported[np.arange(len(top)), top]
+
+
+def report(name, index, queries, expected, row_scores, lexical, masks):
+    print(f"\n📝 {name} ({len(queries)} questions)")
+    expected_text = [index.docs[d]['text'] if d is not None else None for d in expected]
+    for label, allowed_rows in masks.items():
+        top, score = fast_path_replies(index, row_scores, lexical, allowed_rows)
+        fast = score > AIService.FAST_PATH_THRESHOLD
+        line = f"   {label:<14} fast-path share: {fast.mean():6.1%} | mean top score: {score.mean():.3f}"
+        if any(t is not None for t in expected_text):
+            correct = np.array([index.docs[t]['text'] == e for t, e in zip(top, expected_text)])
+            line += f" | top-1 correct: {correct.mean():6.1%}"
+            if fast.any():
+                line += f" | fast-path precision: {correct[fast].mean():6.1%}"
+        print(line)
+
+
+def search_ms(index, query_vecs, repeats=20):
+    """Per-query semantic scoring + max-pool time (the part multi-vector rows make bigger)."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for query_vec in query_vecs:
+            VectorService._semantic_scores(index, query_vec[None, :])
+    return (time.perf_counter() - start) * 1000 / (repeats * len(query_vecs))
+
+
+def answer_only_index(index, answer_rows):
+    """Same KB with only the answer rows, as served before multi-vector entries."""
+    docs = [{k: v for k, v in doc.items() if k != "question_variant"} for doc in index.docs]
+    rows = np.flatnonzero(answer_rows)
+    return KBIndex(docs, index.store[rows], [index.row_hashes[r] for r in rows], index.kb_hash,
+                   storage=index.store.mode)
+
+
+def benchmark_fast_path():
+    """
+    Share of first-turn questions answered straight from the KB (score > FAST_PATH_THRESHOLD)
+    when entries are scored on their answer only vs on their best of answer + question rows.
+    """
+    VectorService.get_model()
+    index = VectorService._index
+    fields = np.array(index.row_fields)
+    answer_rows = fields == "text"
+
+    print("\n🧪 FAST-PATH SHARE: ANSWER-ONLY vs MULTI-VECTOR KB")
+    print("=" * 80)
+    print(f"FAQs: {len(index.docs)} | Vectors: {len(index.store)} | Fields: {sorted(set(index.row_fields))} "
+          f"| Threshold: {AIService.FAST_PATH_THRESHOLD}")
+    print("=" * 80)
+
+    # 1. Customer messages from the repo's scenario tests
+    query_vecs = VectorService._encode_queries(CUSTOMER_MESSAGES)
+    row_scores = index.store.scores(query_vecs)
+    lexical = index.lexical.scores(CUSTOMER_MESSAGES, normalize=True)
+    masks = {
+        "answer-only": np.broadcast_to(answer_rows, row_scores.shape),
+        "multi-vector": np.ones(row_scores.shape, dtype=bool),
+    }
+    report("Scenario test messages", index, CUSTOMER_MESSAGES, [None] * len(CUSTOMER_MESSAGES),
+           row_scores, lexical, masks)
+
+    # Latency side of the trade-off: more rows to score per query
+    answer_only = answer_only_index(index, answer_rows)
+    if len(answer_only.store) != len(index.store):
+        single_ms, multi_ms = search_ms(answer_only, query_vecs), search_ms(index, query_vecs)
+        print(f"   search latency  answer-only {single_ms:.3f} ms ({len(answer_only.store)} rows) | "
+              f"multi-vector {multi_ms:.3f} ms ({len(index.store)} rows) per query")
+
+    # 2. Leave-one-out: each entry's question_variant, with that entry's own question row hidden
+    # (and a BM25 index without question phrasings), so only OTHER entries' questions can help
+    question_rows = np.flatnonzero(fields == "question_variant")
+    if question_rows.shape[0]:
+        own_docs = index.row_doc[question_rows]
+        questions = [index.docs[d]['question_variant'] for d in own_docs]
+        query_vecs = VectorService._encode_queries(questions)
+        row_scores = index.store.scores(query_vecs)
+        no_questions = BM25Index([{k: v for k, v in doc.items() if k != 'question_variant'} for doc in index.docs])
+        lexical = no_questions.scores(questions, normalize=True)
+
+        multi = np.ones(row_scores.shape, dtype=bool)
+        multi[np.arange(len(questions)), question_rows] = False
+        masks = {
+            "answer-only": np.broadcast_to(answer_rows, row_scores.shape),
+            "multi-vector": multi,
+        }
+        report("Held-out question_variant (leave-one-out)", index, questions, list(own_docs),
+               row_scores, lexical, masks)
+    print("-" * 80)
+
+
+if __name__ == "__main__":
+    benchmark_fast_path()
@@ -0,0 +1,99 @@
+import sys
+import os
+import json
+import time
+import resource
+import tempfile
+import subprocess
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+# Usage: python benchmark_onnx.py   (uses EMBEDDING_MODEL; each backend runs in its own process)
+N_SINGLE = 100
+N_BATCH = 256
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def kb_texts():
+    from app.services.vector_service import KB_PATH
+    with open(KB_PATH, 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+    questions = [doc.get('question_variant') or doc['text'] for doc in docs]
+    return questions[:N_SINGLE], [doc['text'] for doc in docs][:N_BATCH]
+
+
+def measure(backend: str, out_path: str):
+    """Child process: load one backend, time it and save its query embeddings."""
+    os.environ["EMBEDDING_BACKEND"] = backend
+    from app.services.vector_service import VectorService
+
+    questions, answers = kb_texts()
+    model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    start = time.perf_counter()
+    model = VectorService._load_embedder(model_name)
+    load_s = time.perf_counter() - start
+    model.encode(questions[:4])  # warm-up
+
+    latencies = []
+    for q in questions:
+        start = time.perf_counter()
+        model.encode([q])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    model.encode(answers)
+    batch_s = time.perf_counter() - start
+
+    np.save(out_path, VectorService._normalize(model.encode(questions)))
+    print(json.dumps({
+        "backend": backend,
+        "loaded": VectorService._embedding_backend,
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "batch_per_s": len(answers) / batch_s,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KB on Linux
+        "torch_loaded": "torch" in sys.modules,
+    }))
+
+
+def benchmark_onnx():
+    """
+    PyTorch vs onnxruntime (fp32 / dynamic int8) embedding backends: load time, single-query
+    latency, batch throughput, peak process memory and cosine parity with PyTorch.
+    """
+    print("\n🧪 EMBEDDING BACKEND BENCHMARK")
+    print("=" * 80)
+    print(f"Model: {os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')} | Single queries: {N_SINGLE} | Batch: {N_BATCH}")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Export once up front so the measured ONNX processes never import PyTorch
+        subprocess.run([sys.executable, __file__, "--measure", "onnx-int8", os.path.join(tmp, "warm.npy")],
+                       check=True, capture_output=True)
+
+        results, vectors = [], {}
+        for backend in BACKENDS:
+            out_path = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run([sys.executable, __file__, "--measure", backend, out_path],
+                                  check=True, capture_output=True, text=True)
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            vectors[backend] = np.load(out_path)
+
+    for result in results:
+        cosine = (vectors[result["backend"]] * vectors["torch"]).sum(axis=1)
+        fallback = "" if result["loaded"] == result["backend"] else f" (fell back to {result['loaded']})"
+        print(f"\n⚙️ {result['backend']}{fallback}")
+        print(f"   Load: {result['load_s']:.2f}s | Peak RSS: {result['peak_rss_mb']:.0f} MB "
+              f"| PyTorch imported: {result['torch_loaded']}")
+        print(f"   Single query: p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms "
+              f"| Batch: {result['batch_per_s']:.0f} texts/s")
+        print(f"   Cosine vs torch: min {cosine.min():.5f}, mean {cosine.mean():.5f}")
+        print("-" * 80)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        benchmark_onnx()
@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.vector_service import VectorService
+from app.services.quantization import QuantizedVectors, STORAGE_MODES
+
+# Extra paraphrases written like real customer chats -> expected KB id
+PARAPHRASES = [
+    ("i forgot my password what do i do", 1),
+    ("cant log in, need to reset my pass", 1),
+]
+
+
+def held_out_questions():
+    """
+    Paraphrased customer questions with a known answer: each KB entry's `question_variant`
+    (scored against answer rows only, so these are unseen) + hand-written ones.
+    """
+    ids = {doc['id'] for doc in VectorService._index.docs}
+    questions = [(doc['question_variant'], doc['id']) for doc in VectorService._index.docs if doc.get('question_variant')]
+    questions += [(q, doc_id) for q, doc_id in PARAPHRASES if doc_id in ids]
+    return questions
+
+
+def float32_answer_vectors(model, index) -> np.ndarray:
+    """
+    Full-precision answer-row vectors, whatever VECTOR_STORAGE the live index uses:
+    the persisted float32 index if it matches the KB, else straight from the encoder.
+    (index.store would hand back a dequantized copy under float16 / int8.)
+    """
+    # Answer rows only (one per entry): question_variant rows would contain the queries themselves
+    answer_rows = np.array([row for row, field in enumerate(index.row_fields) if field == "text"])
+    persisted = VectorService._load_index(model.get_sentence_embedding_dimension())
+    if persisted is not None and persisted[2] == index.kb_hash:
+        return np.array(persisted[0][answer_rows], dtype=np.float32)
+    return VectorService._normalize(model.encode([doc.get("text", "") for doc in index.docs]))
+
+
+def benchmark_quantization():
+    """
+    Recall of float16 / int8 KB storage vs float32 on held-out paraphrased questions.
+    """
+    model = VectorService.get_model()
+    index = VectorService._index
+    float32_vectors = float32_answer_vectors(model, index)
+    doc_ids = np.array([doc['id'] for doc in index.docs])
+
+    questions = held_out_questions()
+    query_vecs = VectorService._encode_queries([q for q, _ in questions])
+    expected = np.array([doc_id for _, doc_id in questions])
+
+    print("\n🧪 KB EMBEDDING QUANTIZATION BENCHMARK")
+    print("=" * 80)
+    print(f"FAQs: {len(index.docs)} | Held-out questions: {len(questions)} | Dim: {float32_vectors.shape[1]}")
+    print("=" * 80)
+
+    baseline_top1 = None
+    for mode in STORAGE_MODES:
+        store = QuantizedVectors(float32_vectors, mode)
+
+        start = time.perf_counter()
+        scores = np.vstack([store.dot(q, out=np.empty(len(store), dtype=np.float32)) for q in query_vecs])
+        ms_per_query = (time.perf_counter() - start) * 1000 / len(questions)
+
+        top3 = np.argsort(-scores, axis=1)[:, :3]
+        top1 = top3[:, 0]
+        recall_1 = float(np.mean(doc_ids[top1] == expected))
+        recall_3 = float(np.mean((doc_ids[top3] == expected[:, None]).any(axis=1)))
+        if baseline_top1 is None:
+            baseline_top1 = top1
+        agreement = float(np.mean(top1 == baseline_top1))
+
+        print(f"\n📦 {mode}")
+        print(f"   Memory: {store.nbytes / 1e6:.2f} MB ({float32_vectors.nbytes / store.nbytes:.1f}x smaller than float32)")
+        print(f"   Recall@1: {recall_1:.3f} | Recall@3: {recall_3:.3f} | Top-1 agreement with float32: {agreement:.3f}")
+        print(f"   Latency: {ms_per_query:.3f} ms/query")
+        print("-" * 80)
+
+
+if __name__ == "__main__":
+    benchmark_quantization()
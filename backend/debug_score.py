@@ -1,4 +1,5 @@
 from app.services.vector_service import VectorService
+from app.services.bm25_index import tokenize
 import numpy as np
 
 def debug():
@@ -9,35 +10,17 @@ def debug():
     VectorService.load_kb()
     model = VectorService.get_model()
     
-    # 1. Vector Score
-    query_vec = model.encode([query])
-    from sklearn.metrics.pairwise import cosine_similarity
-    similarities = cosine_similarity(query_vec, VectorService._kb_vectors)[0]
+    # 1. Vector Score + 2. Hybrid Logic (same scoring path as the live search)
+    query_terms = set(tokenize(query))
+    sims, boosted = VectorService.score_many([query])
+    similarities, boosted_scores = sims[0], boosted[0]
     
-    # 2. Hybrid Logic
-    query_lower = query.lower()
-    boosted_scores = similarities.copy()
-    
-    best_idx = -1
-    best_score = -1.0
+    best_idx = int(np.argmax(boosted_scores))
+    best_score = boosted_scores[best_idx]
     
     # Look for ID 101 specifically
     target_id = 101
-    target_idx = -1
-    
-    for idx, doc in enumerate(VectorService._kb_data):
-        if doc['id'] == target_id:
-            target_idx = idx
-            
-        keywords = doc.get("keywords", [])
-        boost = 0
-        if any(k.lower() in query_lower for k in keywords):
-            boost = 0.15
-            boosted_scores[idx] += boost
-            
-        if boosted_scores[idx] > best_score:
-            best_score = boosted_scores[idx]
-            best_idx = idx
+    target_idx = next((idx for idx, doc in enumerate(VectorService._kb_data) if doc['id'] == target_id), -1)
             
     print(f"\n🏆 BEST MATH:")
     best_doc = VectorService._kb_data[best_idx]
@@ -54,8 +37,8 @@ def debug():
         print(f"Base Score: {similarities[target_idx]:.4f}")
         print(f"Final Score: {boosted_scores[target_idx]:.4f}")
         
-        # Check why keyword didn't match if score is low
-        matches = [k for k in target_doc.get('keywords', []) if k.lower() in query_lower]
+        # Check why keyword didn't match if score is low (BM25 matches whole words)
+        matches = [k for k in target_doc.get('keywords', []) if query_terms & set(tokenize(k))]
         print(f"Matched Keywords: {matches}")
     else:
         print("❌ ID 101 NOT FOUND IN KB")
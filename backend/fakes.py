@@ -0,0 +1,80 @@
+"""
+Test doubles shared by the test_*.py scripts: a SentenceTransformer stand-in (no model download)
+and an in-process AsyncGroq stand-in whose replies come from the fake Groq server's prompt handling.
+"""
+import json
+import asyncio
+import hashlib
+from types import SimpleNamespace
+import numpy as np
+import httpx
+
+from app.services.fake_groq import FakeGroq
+from app.services.history_service import estimate_tokens
+
+
+def hash_vectors(texts, dim):
+    """Deterministic per-text vectors: the same text always gets the same (random) direction."""
+    seeds = [int(hashlib.sha256(t.encode()).hexdigest()[:8], 16) for t in texts]
+    return np.stack([np.random.default_rng(s).standard_normal(dim, dtype=np.float32) for s in seeds])
+
+
+class FakeEmbedder:
+    """
+    Stand-in for SentenceTransformer: deterministic per-text vectors; records every text it encodes.
+    Patch it in as the class (`vector_service.SentenceTransformer`) or pass an instance as the model.
+    """
+
+    def __init__(self, model_name=None, dim=32):
+        self.dim = dim
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return hash_vectors(texts, self.dim)
+
+
+class FakeGroqClient:
+    """
+    In-process stand-in for the AsyncGroq client (`chat.completions.create`, plain and streamed).
+    Replies come from FakeGroq's handling of LLMService's prompts, unless `reply(messages)` returns
+    something else for them (a dict is sent as JSON, None keeps the default). Every request's
+    messages are kept in `calls`; `latency_s` delays each reply without blocking the loop, `fail`
+    raises instead, and `fail_after` drops a stream after that many chunks.
+    """
+
+    def __init__(self, reply=None, latency_s=0.0, chunk_delay_s=0.0, fail=False):
+        self.reply = reply
+        self.groq = FakeGroq(seed=0)
+        self.latency_s = latency_s
+        self.chunk_delay_s = chunk_delay_s
+        self.fail = fail
+        self.fail_after = None
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, stream=False, **kwargs):
+        self.calls.append(messages)
+        if self.fail:
+            raise RuntimeError("groq down")
+        await asyncio.sleep(self.latency_s)
+        content = self.reply(messages) if self.reply else None
+        if content is None:
+            content = self.groq.reply(messages)
+        elif not isinstance(content, str):
+            content = json.dumps(content)
+        usage = SimpleNamespace(prompt_tokens=sum(estimate_tokens(m["content"]) for m in messages),
+                                completion_tokens=estimate_tokens(content))
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+        async def chunks():
+            for n, i in enumerate(range(0, len(content), 6)):
+                if n == self.fail_after:
+                    raise httpx.ReadError("connection reset by peer")
+                await asyncio.sleep(self.chunk_delay_s)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 6]))])
+        return chunks()
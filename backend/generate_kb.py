@@ -125,14 +125,16 @@ def main():
             new_faqs = generate_faqs_for_topic(category, topic, count=30)
             
             for faq in new_faqs:
+                # 'text' is the ANSWER; the client's phrasing is kept in 'question_variant'.
+                # VectorService embeds both (VECTOR_EMBED_FIELDS), so customer questions can
+                # match a stored question instead of only an answer.
+                question = (faq.pop('question', None) or faq.get('question_variant') or '').strip()
+                if not faq.get('text'):
+                    continue
+                if question:
+                    faq['question_variant'] = question
                 faq['id'] = next_id
                 next_id += 1
-                # Format text to include question context if needed, but RAG usually searches against 'text'.
-                # To make RAG better, let's combine Question + Answer in 'text' or keep them separate?
-                # Current system searches 'text'. Let's Ensure 'text' is the ANSWER, but rich in keywords.
-                # Actually, standard RAG chunks usually contain the Answer. The query matches the answer's meaning.
-                # But sometimes matching Q to Q is better. 
-                # Let's stick to Text = Answer, but make sure Answer is descriptive.
                 
                 current_kb.append(faq)
                 total_new += 1
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.database import create_db_and_tables
 from app.api import chat, issues, debug
 
@@ -18,6 +19,10 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+
+    # Warm the embedding model + KB index in the background while the app already serves '/'
+    from app.services.vector_service import VectorService
+    VectorService.start_warmup()
     
     # Auto-create Test Employee (Rawan) on startup to ensure she exists on Hugging Face
     from sqlmodel import Session, select
@@ -97,3 +102,11 @@ app.include_router(debug.router, prefix="/api/debug", tags=["Debug"])
 @app.get("/")
 def read_root():
     return {"message": "ZEdny AI Backend is Running 🚀"}
+
+@app.get("/ready")
+def readiness():
+    """Readiness probe: 200 once the model and KB index are warm, 503 while cold/warming."""
+    from app.services.vector_service import VectorService
+
+    status = VectorService.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
@@ -1,9 +1,10 @@
 import requests
+import os
 import json
 from datetime import datetime
 
 # API Endpoint - Using Hugging Face deployment
-API_URL = "https://rawanpo-zedny-ai.hf.space/api/chat/"
+API_URL = os.getenv("CHAT_API_URL", "https://rawanpo-zedny-ai.hf.space/api/chat/")
 TIMEOUT = 120  # 2 minutes for slow LLM responses
 
 # Test Cases
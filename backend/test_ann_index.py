@@ -0,0 +1,46 @@
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.ann_index import ExactIndex, IVFIndex, build_index
+from app.services.quantization import QuantizedVectors, STORAGE_MODES
+
+
+def unit_vectors(n, dim, seed):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_exact_search_on_every_storage_mode():
+    print("\n--- 🎯 Exact search over quantized stores ---")
+    kb, queries = unit_vectors(500, 64, 0), unit_vectors(20, 64, 1)
+    expected = np.argsort(-(queries @ kb.T), axis=1)[:, 0]
+
+    for mode in STORAGE_MODES:
+        index = build_index(QuantizedVectors(kb, mode), backend="exact")
+        ids, scores = index.search(queries, 5)
+        print(f"{mode}: top-1 agreement {np.mean(ids[:, 0] == expected):.2f}")
+        assert ids.shape == scores.shape == (20, 5)
+        assert np.all(np.diff(scores, axis=1) <= 0)
+        assert np.mean(ids[:, 0] == expected) >= 0.9
+
+    # A plain float32 matrix is wrapped, not copied
+    index = ExactIndex(kb)
+    assert np.shares_memory(index.vectors.data, kb)
+    assert np.array_equal(index.search(queries, 1)[0][:, 0], expected)
+
+
+def test_ivf_matches_exact_with_all_cells_probed():
+    print("\n--- 🗂️ IVF with nprobe = nlist ---")
+    kb, queries = unit_vectors(2000, 32, 2), unit_vectors(20, 32, 3)
+    ivf = IVFIndex(QuantizedVectors(kb, "float32"), nlist=16, nprobe=16)
+    ivf_ids, _ = ivf.search(queries, 3)
+    exact_ids, _ = ExactIndex(kb).search(queries, 3)
+    assert np.array_equal(ivf_ids, exact_ids)
+
+
+if __name__ == "__main__":
+    test_exact_search_on_every_storage_mode()
+    test_ivf_matches_exact_with_all_cells_probed()
+    print("\n✅ ANN index tests passed")
@@ -0,0 +1,60 @@
+import sys
+import os
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.answer_cache import SemanticAnswerCache
+
+DIM = 32
+
+
+def unit(v):
+    return (v / np.linalg.norm(v)).astype(np.float32)
+
+
+def paraphrase(v, rng, noise):
+    """A vector at roughly cosine 1 / sqrt(1 + noise^2) from v."""
+    return unit(v + noise * unit(rng.standard_normal(DIM)))
+
+
+def test_semantic_answer_cache():
+    print("\n--- 💾 Semantic answer cache ---")
+    rng = np.random.default_rng(0)
+    cache = SemanticAnswerCache(max_size=3, ttl=0, threshold=0.95)
+    questions = [unit(rng.standard_normal(DIM)) for _ in range(4)]
+
+    # Near-duplicate questions hit, unrelated / loose paraphrases miss
+    cache.store(questions[0], {"text": "answer 0"}, "kb-1")
+    answer, similarity = cache.lookup(paraphrase(questions[0], rng, 0.1), "kb-1")
+    assert answer == {"text": "answer 0"} and similarity >= 0.95
+    assert cache.lookup(questions[1], "kb-1")[0] is None
+    assert cache.lookup(paraphrase(questions[0], rng, 0.6), "kb-1")[0] is None
+
+    # LRU: question 0 was just used, so adding 3 more entries evicts question 1
+    for i in (1, 2):
+        cache.store(questions[i], {"text": f"answer {i}"}, "kb-1")
+    assert cache.lookup(questions[0], "kb-1")[0] == {"text": "answer 0"}
+    cache.store(questions[3], {"text": "answer 3"}, "kb-1")
+    assert cache.lookup(questions[1], "kb-1")[0] is None
+    assert [cache.lookup(questions[i], "kb-1")[0]["text"] for i in (0, 2, 3)] == ["answer 0", "answer 2", "answer 3"]
+
+    # A KB change drops every cached answer
+    assert cache.lookup(questions[0], "kb-2")[0] is None
+    stats = cache.stats()
+    print(f"Stats: {stats}")
+    assert stats["size"] == 0 and stats["invalidations"] == 1 and stats["evictions"] == 1
+    assert stats["hits"] == 5 and stats["lookups"] == 9
+
+    # TTL: expired answers are not served and free their slot
+    cache = SemanticAnswerCache(max_size=2, ttl=0.05, threshold=0.95)
+    cache.store(questions[0], {"text": "answer 0"}, "kb-1")
+    time.sleep(0.1)
+    assert cache.lookup(questions[0], "kb-1")[0] is None
+    assert cache.stats()["size"] == 0
+    cache.store(questions[0], {"text": "fresh answer"}, "kb-1")
+    assert cache.lookup(questions[0], "kb-1")[0] == {"text": "fresh answer"}
+
+
+if __name__ == "__main__":
+    test_semantic_answer_cache()
@@ -0,0 +1,77 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+from unittest import mock
+import httpx
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add BACKEND directory to path (so 'app' is top-level)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.core.database as database
+import app.services.vector_service as vector_service
+from app.services.vector_service import VectorService
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.models.models import Employee
+from main import app
+from fakes import FakeEmbedder, FakeGroqClient
+
+N_SESSIONS = 8
+LLM_LATENCY = 0.5  # seconds per fake Groq completion
+
+
+async def run_load(n_sessions: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def one_session(i):
+            return await client.post("/api/chat/", json={"message": f"question number {i}", "session_id": f"load-{i}"})
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(one_session(i) for i in range(n_sessions)))
+        elapsed = time.perf_counter() - start
+
+        escalation = await client.post("/api/chat/", json={"message": "please escalate, site is down", "session_id": "load-esc"})
+    return responses, elapsed, escalation
+
+
+def test_concurrent_chats_run_in_parallel():
+    print(f"\n--- ⚡ {N_SESSIONS} concurrent chat sessions (fake LLM latency {LLM_LATENCY}s) ---")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        sync_engine = create_engine(f"sqlite:///{db_path}")
+        SQLModel.metadata.create_all(sync_engine)
+        with Session(sync_engine) as s:
+            s.add(Employee(name="Test Senior", email="senior@example.com", department="web", role="senior"))
+            s.commit()
+
+        with mock.patch.object(database, "async_engine", create_async_engine(f"sqlite+aiosqlite:///{db_path}")), \
+                mock.patch.object(vector_service, "SentenceTransformer", FakeEmbedder), \
+                mock.patch.object(vector_service, "INDEX_DIR", os.path.join(tmp, "kb_index")), \
+                mock.patch.object(vector_service, "KB_RELOAD_INTERVAL", 0), \
+                mock.patch.object(VectorService, "_model", None), \
+                mock.patch.object(VectorService, "_index", None), \
+                mock.patch.object(VectorService, "_batcher", None), \
+                mock.patch.object(LLMService, "_client", FakeGroqClient(latency_s=LLM_LATENCY)), \
+                mock.patch.object(LLMService, "_breaker", CircuitBreaker()):
+            VectorService.get_model()  # Warm, like the startup hook does
+            responses, elapsed, escalation = asyncio.run(run_load(N_SESSIONS))
+
+    serialized = N_SESSIONS * LLM_LATENCY
+    print(f"Elapsed: {elapsed:.2f}s (serialized would be >= {serialized:.1f}s)")
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses]
+    assert all(r.json()["action"] == "reply" and r.json()["text"] for r in responses)
+    assert elapsed < serialized / 2
+
+    print(f"Escalation: {escalation.json()}")
+    assert escalation.status_code == 200
+    assert escalation.json()["action"] == "escalate"
+    assert escalation.json()["escalation"]["department"] == "web"
+
+
+if __name__ == "__main__":
+    test_concurrent_chats_run_in_parallel()
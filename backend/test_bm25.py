@@ -0,0 +1,38 @@
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.bm25_index import BM25Index
+
+DOCS = [
+    {"id": 1, "text": "Our REST API returns JSON.", "keywords": ["api", "integration"]},
+    {"id": 2, "text": "We offer rapid prototyping for startups.", "keywords": ["mvp", "prototype"]},
+    {"id": 3, "text": "Reset your password from the login page.", "keywords": ["password", "reset"],
+     "question_variant": "I forgot my password"},
+    {"id": 4, "text": "Contact us for pricing of the website package.", "keywords": ["pricing"]},
+]
+
+
+def test_bm25_lexical_scores():
+    print("\n--- 🔤 BM25 lexical index ---")
+    index = BM25Index(DOCS)
+
+    scores = index.scores(["is the api down?", "i forgot it", "how do i do it", "zzz"])
+    print(f"Scores:\n{np.round(scores, 3)}")
+
+    # Whole-word matching: 'api' hits the API doc but not 'rapid'
+    assert scores[0, 0] > 0 and scores[0, 1] == 0
+    # Question phrasings are indexed too
+    assert scores[1].argmax() == 2
+    # Stopword-only and out-of-vocabulary queries score nothing
+    assert not scores[2].any() and not scores[3].any()
+
+    normalized = index.scores(["reset password", "password pricing api prototype"], normalize=True)
+    assert normalized.min() >= 0 and normalized.max() <= 1
+    # Matching every query term beats matching one of several
+    assert normalized[0, 2] > 0.5 > normalized[1].max()
+
+
+if __name__ == "__main__":
+    test_bm25_lexical_scores()
@@ -0,0 +1,169 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+from unittest import mock
+import httpx
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add BACKEND directory to path (so 'app' is top-level)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.core.database as database
+import app.services.vector_service as vector_service
+import app.services.ai_service as ai_service
+from app.services.vector_service import VectorService
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_gateway import LLMGateway
+from app.services.ai_service import AIService
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.json_stream import JsonFieldStream
+from app.models.models import Employee
+from main import app
+from fakes import FakeEmbedder, FakeGroqClient
+
+ANSWER = {"action": "answer", "text": "Our office in New Cairo is open Sunday to Thursday, 9 AM – 5 PM. \"See you\" 👋",
+          "reasoning": "office hours from KB"}
+CHUNK_DELAY = 0.02  # seconds between fake Groq stream chunks
+
+
+def answer_decisions(messages):
+    """Every decision is ANSWER (the classification prompt keeps the fake Groq's reply)."""
+    return ANSWER if "Customer Service Coordinator" in messages[0]["content"] else None
+
+
+async def read_events(message, session_id):
+    """
+    (event, data, seconds since request) for each SSE event of one streamed chat.
+    Drives the ASGI app directly: httpx's ASGITransport buffers whole responses.
+    """
+    body = json.dumps({"message": message, "session_id": session_id}).encode()
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream", "root_path": "",
+             "query_string": b"", "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+             "client": ("test", 1), "server": ("test", 80)}
+    requested, chunks, start = False, [], time.perf_counter()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            headers = dict(message["headers"])
+            assert message["status"] == 200 and headers[b"content-type"].startswith(b"text/event-stream")
+        elif message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((message["body"].decode(), time.perf_counter() - start))
+
+    await app(scope, receive, send)
+
+    events = []
+    for chunk, t in chunks:
+        for block in filter(None, chunk.split("\n\n")):
+            fields = dict(line.split(": ", 1) for line in block.split("\n"))
+            events.append((fields["event"], json.loads(fields["data"]), t))
+    return events
+
+
+async def run_chats():
+    answer = await read_events("When is your office open?", "stream-1")
+    escalation = await read_events("please escalate, I need a human", "stream-2")
+    # The Groq stream drops after 8 chunks, a few tokens into the reply text
+    LLMService._client.fail_after = 8
+    with mock.patch.object(ai_service, "ANSWER_CACHE_ENABLED", False):
+        broken = await read_events("Is the office open on Friday?", "stream-3")
+    return answer, escalation, broken
+
+
+def test_json_field_stream():
+    print("\n--- 🧩 Incremental JSON text field ---")
+    raw = "```json\n" + json.dumps({"action": "answer", "meta": {"text": "nested"}, "n": 1, **ANSWER}) + "\n```"
+    for size in (1, 2, 5, 64):
+        parser = JsonFieldStream("text")
+        assert "".join(parser.feed(raw[i:i + size]) for i in range(0, len(raw), size)) == ANSWER["text"]
+        assert parser.done
+
+
+def test_streamed_chat():
+    print("\n--- 📡 SSE chat stream ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        sync_engine = create_engine(f"sqlite:///{db_path}")
+        SQLModel.metadata.create_all(sync_engine)
+        with Session(sync_engine) as s:
+            s.add(Employee(name="Test Senior", email="senior@example.com", department="general", role="senior"))
+            s.commit()
+
+        with mock.patch.object(database, "async_engine", create_async_engine(f"sqlite+aiosqlite:///{db_path}")), \
+                mock.patch.object(vector_service, "SentenceTransformer", FakeEmbedder), \
+                mock.patch.object(vector_service, "INDEX_DIR", os.path.join(tmp, "kb_index")), \
+                mock.patch.object(vector_service, "KB_RELOAD_INTERVAL", 0), \
+                mock.patch.object(VectorService, "_model", None), \
+                mock.patch.object(VectorService, "_index", None), \
+                mock.patch.object(VectorService, "_batcher", None), \
+                mock.patch.object(AIService, "_answer_cache", SemanticAnswerCache()), \
+                mock.patch.object(LLMService, "_client", FakeGroqClient(answer_decisions, chunk_delay_s=CHUNK_DELAY)), \
+                mock.patch.object(LLMService, "_breaker", CircuitBreaker()):
+            VectorService.get_model()
+            answer, escalation, broken = asyncio.run(run_chats())
+            breaker = LLMService._breaker.stats()
+
+    tokens = [(data["text"], t) for event, data, t in answer if event == "token"]
+    done = [data for event, data, _ in answer if event == "done"]
+    first_token, total = tokens[0][1], answer[-1][2]
+    print(f"Tokens: {len(tokens)} | First token: {first_token * 1000:.0f} ms | Done: {total * 1000:.0f} ms")
+    assert "".join(text for text, _ in tokens) == ANSWER["text"]
+    assert len(done) == 1 and answer[-1][0] == "done"
+    assert done[0]["action"] == "reply" and done[0]["text"] == ANSWER["text"]
+    assert first_token < total / 2
+
+    # Force-escalation skips the LLM stream: one token event, then the escalation metadata
+    print(f"Escalation events: {[event for event, _, _ in escalation]}")
+    assert [event for event, _, _ in escalation] == ["token", "done"]
+    final = escalation[-1][1]
+    assert final["action"] == "escalate" and final["escalation"]["escalated"]
+    assert final["text"].startswith(escalation[0][1]["text"])
+
+    # Broken stream: the partial tokens are withdrawn with a reset before the fallback reply
+    events = [event for event, _, _ in broken]
+    print(f"Broken stream events: {events} | breaker: {breaker['failure_rate']} failure rate")
+    assert "reset" in events and events[-1] == "done"
+    reset = events.index("reset")
+    assert "token" in events[:reset]
+    replacement = "".join(data["text"] for event, data, _ in broken[reset:] if event == "token")
+    assert replacement == broken[-1][1]["text"]
+    # Answer stream + escalation decision and classification succeeded, the broken stream failed
+    assert breaker["window_calls"] == 4 and breaker["failure_rate"] == 0.25
+
+
+def test_stream_slot_released_when_consumer_fails():
+    print("\n--- 🎟️ Gateway slot of an abandoned stream ---")
+    gateway = LLMGateway(max_concurrency=1)
+
+    async def failing_on_token(text):
+        raise RuntimeError("client went away")
+
+    async def run():
+        decision = await LLMService.stream_next_step([{"role": "user", "content": "When are you open?"}],
+                                                     failing_on_token)
+        return decision, gateway.stats()["in_flight"]
+
+    with mock.patch.object(LLMService, "_client", FakeGroqClient(answer_decisions, chunk_delay_s=CHUNK_DELAY)), \
+            mock.patch.object(LLMService, "_breaker", CircuitBreaker()), \
+            mock.patch.object(LLMService, "_gateway", gateway):
+        decision, in_flight = asyncio.run(run())
+    print(f"Decision: {decision['text']} | in flight right after: {in_flight}")
+    assert decision.get("fallback") and in_flight == 0
+
+
+if __name__ == "__main__":
+    test_json_field_stream()
+    test_streamed_chat()
+    test_stream_slot_released_when_consumer_fails()
@@ -0,0 +1,176 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+from unittest import mock
+import httpx
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.llm_service as llm_service
+import app.services.ai_service as ai_service
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.fake_groq import FakeGroq
+from app.services.vector_service import VectorService
+from app.services.ai_service import AIService
+import app.models.models  # noqa: F401  (registers the tables)
+
+OUTAGE = "Our website is down and checkout crashes, this is urgent"
+KB_DOC = {"text": "We work Sunday to Thursday, 9 AM - 5 PM (Cairo time).", "category": "hours"}
+
+
+def history(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_breaker_state_machine():
+    print("\n--- ⚡ Circuit breaker states ---")
+    breaker = CircuitBreaker(enabled=True, window=10, min_calls=4, failure_rate=0.5, slow_call_s=1,
+                             slow_rate=0.5, cooldown_s=0.05)
+
+    for ok in (True, True, False):
+        assert breaker.allow()
+        breaker.record(ok, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED  # below min_calls
+    breaker.record(False, 0.1)
+    print(f"After 2/4 failures: {breaker.state}")
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    # Half-open: one probe at a time; a failed probe reopens
+    time.sleep(0.06)
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # A slow probe also reopens, a fast one closes
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, 2.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # Mostly slow (but successful) calls open it too
+    for _ in range(4):
+        breaker.record(True, 1.5)
+    stats = breaker.stats()
+    print(f"Stats: {stats}")
+    assert stats["state"] == CircuitBreaker.OPEN and stats["opened"] == 4 and stats["rejected"] == 2
+
+
+def test_open_circuit_falls_back_locally():
+    print("\n--- 🔌 Groq outage: fail fast, local fallbacks, recovery ---")
+    fake = FakeGroq(latency_ms=5, error_rate=1.0, seed=1)
+    breaker = CircuitBreaker(enabled=True, window=10, min_calls=3, failure_rate=0.5, cooldown_s=0.2)
+
+    async def no_sleep(delay):
+        pass
+
+    with mock.patch.object(LLMService, "_client", LLMService._build_client("fake", transport=fake.transport())), \
+            mock.patch.object(LLMService, "_breaker", breaker), \
+            mock.patch.object(llm_service, "LLM_MAX_RETRIES", 1), \
+            mock.patch.object(llm_service.asyncio, "sleep", no_sleep):
+        for _ in range(3):
+            asyncio.run(LLMService.decide_next_step(history("When are you open?")))
+        requests = fake.counts["requests"]
+        print(f"Breaker after 3 failed calls: {breaker.state} ({requests} requests)")
+        assert breaker.state == CircuitBreaker.OPEN
+
+        start = time.perf_counter()
+        decision = asyncio.run(LLMService.decide_next_step(history("When are you open?")))
+        classification = asyncio.run(LLMService.classify_message(OUTAGE))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Open circuit: {elapsed_ms:.1f} ms | {decision['text']} | "
+              f"{classification['department']} ({classification['priority']})")
+        assert fake.counts["requests"] == requests  # Groq is not called
+        assert elapsed_ms < 50
+        assert decision.get("fallback")
+        assert classification["department"] == "web" and classification["priority"] == "high"
+        assert classification["reasoning"].startswith("Rule-based fallback")
+
+        # Groq recovers: after the cooldown one probe goes through and closes the circuit
+        fake.error_rate = 0
+        time.sleep(0.25)
+        decision = asyncio.run(LLMService.decide_next_step(history("Where is your office located?")))
+        print(f"After cooldown: {breaker.state} | {decision['text']}")
+        assert not decision.get("fallback")
+        assert breaker.state == CircuitBreaker.CLOSED and breaker.probes == 1
+        assert LLMService.stats()["circuit_breaker"]["opened"] == 1
+
+
+def test_rejected_requests_do_not_trip():
+    print("\n--- 🚫 4xx responses are not outages ---")
+    requests = []
+
+    def bad_request(request):
+        requests.append(request)
+        return httpx.Response(400, json={"error": {"message": "context_length_exceeded"}})
+
+    breaker = CircuitBreaker(enabled=True, window=10, min_calls=3, failure_rate=0.5, cooldown_s=60)
+    client = LLMService._build_client("test-key", transport=httpx.MockTransport(bad_request))
+    with mock.patch.object(LLMService, "_client", client), \
+            mock.patch.object(LLMService, "_breaker", breaker):
+        for _ in range(5):
+            asyncio.run(LLMService.decide_next_step(history("When are you open?")))
+    print(f"5 rejected requests: {len(requests)} sent, breaker {breaker.state}")
+    assert len(requests) == 5  # neither retried nor short-circuited
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.stats()["failure_rate"] == 0.0
+
+
+async def chat(db_url, session_id, message, matches):
+    async def search(queries, k=3, threshold=0.35, filters=None):
+        return [matches for _ in queries]
+
+    engine = create_async_engine(db_url)
+    with mock.patch.object(VectorService, "asearch_many", search):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            result = await AIService.process_message(message, session_id, session)
+    await engine.dispose()
+    return result
+
+
+def test_process_message_without_llm():
+    print("\n--- 📚 Chats while the circuit is open ---")
+    breaker = CircuitBreaker(enabled=True, cooldown_s=60)
+    breaker._open("test outage")
+    client = FakeGroq(seed=1)
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch.object(LLMService, "_client", LLMService._build_client("fake", transport=client.transport())), \
+            mock.patch.object(LLMService, "_breaker", breaker), \
+            mock.patch.object(ai_service, "ANSWER_CACHE_ENABLED", False):
+        db_path = os.path.join(tmp, "test.db")
+        SQLModel.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+        db_url = f"sqlite+aiosqlite:///{db_path}"
+
+        # KB match good enough to answer on its own
+        kb = asyncio.run(chat(db_url, "s1", "What are your working hours?", [{"doc": KB_DOC, "score": 0.62}]))
+        # Weak KB match, but the keyword matcher knows the topic
+        keyword = asyncio.run(chat(db_url, "s2", "How do I reset my password?", [{"doc": KB_DOC, "score": 0.2}]))
+        # A real issue: escalated with the rule-based classification
+        outage = asyncio.run(chat(db_url, "s3", OUTAGE, []))
+        # Nothing to go on: the generic fallback reply
+        vague = asyncio.run(chat(db_url, "s4", "hmm", []))
+
+    for name, result in (("kb", kb), ("keyword", keyword), ("outage", outage), ("vague", vague)):
+        print(f"{name:<8} {result['action']:<9} {result.get('source', '')} {result['text'][:60]}")
+    assert client.counts["requests"] == 0
+    assert kb["text"] == KB_DOC["text"] and kb["source"] == "kb_fallback"
+    assert "Forgot Password" in keyword["text"] and keyword["source"] == "keyword_fallback"
+    assert outage["action"] == "escalate"
+    assert outage["report"]["department"] == "web" and outage["report"]["priority"] == "high"
+    assert vague["action"] == "reply" and "trouble" in vague["text"]
+
+
+if __name__ == "__main__":
+    test_breaker_state_machine()
+    test_open_circuit_falls_back_locally()
+    test_rejected_requests_do_not_trip()
+    test_process_message_without_llm()
+    print("\n✅ Circuit breaker tests passed")
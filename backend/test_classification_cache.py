@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+import asyncio
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.llm_service as llm_service
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.cache import LRUCache
+from fakes import FakeGroqClient
+
+
+OUTAGE = {"department": "web", "priority": "high", "summary": "Site down", "intent": "complaint",
+          "reasoning": "outage"}
+
+
+def outage(messages):
+    return OUTAGE
+
+
+def classify_all(messages):
+    async def run():
+        return [await LLMService.classify_message(m) for m in messages]
+    return asyncio.run(run())
+
+
+def test_classification_cache():
+    print("\n--- 💾 Classification cache ---")
+    client = FakeGroqClient(outage)
+    with mock.patch.object(LLMService, "_client", client), \
+            mock.patch.object(LLMService, "_breaker", CircuitBreaker()), \
+            mock.patch.object(LLMService, "_classification_cache", LRUCache(16, ttl=0.2)):
+        # Normalized-identical repeats are served from the cache
+        results = classify_all(["It's still down", "  it's STILL   down!! ", "It's still down"])
+        print(f"3 repeats -> {len(client.calls)} LLM call(s) | {LLMService.stats()['classification_cache']}")
+        assert len(client.calls) == 1
+        assert all(r["department"] == "web" and r["priority"] == "high" for r in results)
+        results[0]["technical_details"].append("mutated by caller")
+        assert "mutated by caller" not in classify_all(["it's still down"])[0]["technical_details"]
+
+        # A different message, a prompt change or an expired entry goes back to the LLM
+        classify_all(["The checkout page is broken"])
+        assert len(client.calls) == 2
+        with mock.patch.object(llm_service, "CLASSIFICATION_RULES", llm_service.CLASSIFICATION_RULES + "\n- new rule"):
+            classify_all(["It's still down"])
+        assert len(client.calls) == 3
+        time.sleep(0.25)
+        classify_all(["It's still down"])
+        assert len(client.calls) == 4
+
+    # Failed classifications are not cached
+    failing = FakeGroqClient(fail=True)
+    with mock.patch.object(LLMService, "_client", failing), \
+            mock.patch.object(LLMService, "_breaker", CircuitBreaker()), \
+            mock.patch.object(LLMService, "_classification_cache", LRUCache(16)):
+        results = classify_all(["It's still down", "It's still down"])
+    assert len(failing.calls) == 2 and results[0]["department"] == "general"
+
+
+if __name__ == "__main__":
+    test_classification_cache()
@@ -0,0 +1,73 @@
+import sys
+import os
+import asyncio
+import tempfile
+from unittest import mock
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.llm_service as llm_service
+import app.services.ai_service as ai_service
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.vector_service import VectorService
+from app.services.ai_service import AIService
+import app.models.models  # noqa: F401  (registers the tables)
+from fakes import FakeGroqClient
+
+CLASSIFICATION = {"department": "ai", "priority": "high", "summary": "Chatbot quotes wrong prices", "intent": "complaint"}
+
+
+def escalate_everything(messages):
+    """Escalates every conversation, classified as CLASSIFICATION."""
+    if messages[-1]["content"].startswith("Customer Message:"):
+        return {**CLASSIFICATION, "reasoning": "classifier"}
+    decision = {"action": "escalate", "text": "Forwarding this to our AI team.", "reasoning": "model issue"}
+    if "=== ESCALATION CLASSIFICATION ===" in messages[0]["content"]:
+        decision.update(CLASSIFICATION)
+    return decision
+
+
+async def no_matches(queries, k=3, threshold=0.35, filters=None):
+    return [[] for _ in queries]
+
+
+async def escalate_once(db_url, session_id):
+    engine = create_async_engine(db_url)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        result = await AIService.process_message("Your chatbot keeps quoting customers wrong prices", session_id, session)
+    await engine.dispose()
+    return result
+
+
+def test_combined_decision_skips_classification_call():
+    print("\n--- 🧠 Combined decision + classification ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        SQLModel.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+
+        reports = {}
+        for combined in (True, False):
+            client = FakeGroqClient(escalate_everything)
+            with mock.patch.object(llm_service, "LLM_COMBINED_DECISION", combined), \
+                    mock.patch.object(ai_service, "ANSWER_CACHE_ENABLED", False), \
+                    mock.patch.object(VectorService, "asearch_many", no_matches), \
+                    mock.patch.object(LLMService, "_client", client), \
+                    mock.patch.object(LLMService, "_breaker", CircuitBreaker()):
+                result = asyncio.run(escalate_once(f"sqlite+aiosqlite:///{db_path}", f"combined-{combined}"))
+            print(f"combined={combined}: {len(client.calls)} LLM call(s) -> {result['report']['department']} "
+                  f"({result['report']['priority']})")
+            assert result["action"] == "escalate"
+            assert len(client.calls) == (1 if combined else 2)
+            reports[combined] = result["report"]
+
+    # Same classification either way
+    for key in ("summary", "department", "priority"):
+        assert reports[True][key] == reports[False][key]
+    assert reports[True]["department"] == "ai" and reports[True]["summary"] == CLASSIFICATION["summary"]
+
+
+if __name__ == "__main__":
+    test_combined_decision_skips_classification_call()
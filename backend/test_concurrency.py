@@ -0,0 +1,136 @@
+import sys
+import os
+import time
+import tempfile
+import threading
+from unittest import mock
+import numpy as np
+
+# Add BACKEND directory to path (so 'app' is top-level)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.vector_service as vector_service
+import app.services.llm_service as llm_service
+from app.services.vector_service import VectorService
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.llm_service import LLMService
+from fakes import FakeEmbedder
+
+N_THREADS = 16
+
+
+class SlowCountingModel(FakeEmbedder):
+    """Slow to load; counts how many times it was loaded and how many texts it encoded."""
+    loads = 0
+    encodes = 0
+    _lock = threading.Lock()
+
+    def __init__(self, model_name):
+        super().__init__(model_name, dim=8)
+        with SlowCountingModel._lock:
+            SlowCountingModel.loads += 1
+        time.sleep(0.5)  # Widen the race window like a real model download/load
+
+    def encode(self, texts):
+        with SlowCountingModel._lock:
+            SlowCountingModel.encodes += len(texts)
+        return super().encode(texts)
+
+
+def fire_concurrently(target, n_threads=N_THREADS):
+    """Release n_threads calls of target() at the same instant; return their results/errors."""
+    barrier = threading.Barrier(n_threads)
+    results, errors = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_first_searches_load_model_once():
+    print(f"\n--- 🧵 {N_THREADS} concurrent first searches ---")
+    SlowCountingModel.loads = SlowCountingModel.encodes = 0
+
+    with tempfile.TemporaryDirectory() as index_dir, \
+            mock.patch.object(vector_service, "SentenceTransformer", SlowCountingModel), \
+            mock.patch.object(vector_service, "INDEX_DIR", index_dir), \
+            mock.patch.object(vector_service, "KB_RELOAD_INTERVAL", 0), \
+            mock.patch.object(VectorService, "_model", None), \
+            mock.patch.object(VectorService, "_index", None), \
+            mock.patch.object(VectorService, "_batcher", None):
+
+        results, errors = fire_concurrently(lambda: VectorService.search("where is your office", threshold=-1.0))
+        kb_vectors = len(VectorService._index.store)
+
+    print(f"Model loads: {SlowCountingModel.loads} | Texts encoded: {SlowCountingModel.encodes} | Errors: {errors}")
+    assert not errors
+    assert SlowCountingModel.loads == 1
+    # KB (answer + question rows) encoded exactly once (+ at most one query encode per search)
+    assert SlowCountingModel.encodes <= kb_vectors + N_THREADS
+    assert all(r is not None for r in results)
+
+
+def test_embedding_batcher_groups_concurrent_encodes():
+    print(f"\n--- 🧵 {N_THREADS} concurrent encodes through the batcher ---")
+    calls = []
+
+    def slow_encode(texts):
+        calls.append(len(texts))
+        time.sleep(0.05)  # Later callers queue up while a batch is encoding
+        return np.array([[float(t.split()[-1])] for t in texts], dtype=np.float32)
+
+    batcher = EmbeddingBatcher(slow_encode, window_ms=5, max_batch=64)
+    counter = iter(range(N_THREADS))
+    lock = threading.Lock()
+
+    def encode_own_query():
+        with lock:
+            i = next(counter)
+        return i, batcher.encode([f"question {i}", f"question {i + 1000}"])
+
+    results, errors = fire_concurrently(encode_own_query)
+    stats = batcher.stats()
+
+    print(f"Model calls: {len(calls)} | Batch sizes: {stats['batch_size_histogram']} | Errors: {errors}")
+    assert not errors
+    # Every caller gets back exactly its own rows, in order
+    assert all(v[:, 0].tolist() == [i, i + 1000] for i, v in results)
+    assert stats["texts"] == 2 * N_THREADS
+    assert stats["requests"] == N_THREADS
+    assert len(calls) < N_THREADS
+
+
+def test_concurrent_get_client_creates_one_client():
+    print(f"\n--- 🧵 {N_THREADS} concurrent LLMService.get_client() ---")
+    created = []
+
+    def slow_groq(api_key, **kwargs):
+        created.append(api_key)
+        time.sleep(0.2)
+        return object()
+
+    with mock.patch.object(llm_service, "AsyncGroq", side_effect=slow_groq), \
+            mock.patch.dict(os.environ, {"GROQ_API_KEY": "test-key"}), \
+            mock.patch.object(LLMService, "_client", None):
+        results, errors = fire_concurrently(LLMService.get_client)
+
+    print(f"Clients created: {len(created)} | Errors: {errors}")
+    assert not errors
+    assert len(created) == 1
+    assert all(r is results[0] for r in results)
+
+
+if __name__ == "__main__":
+    test_concurrent_first_searches_load_model_once()
+    test_embedding_batcher_groups_concurrent_encodes()
+    test_concurrent_get_client_creates_one_client()
@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import socket
+import asyncio
+import threading
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.llm_service as llm_service
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.fake_groq import FakeGroq
+
+RAG = "Topic: support\nContent: Our office is open Sunday to Thursday, 9 AM to 5 PM."
+
+
+def history(text):
+    return [{"role": "user", "content": text}]
+
+
+async def exercise():
+    answer = await LLMService.decide_next_step(history("When is your office open on Thursday?"), rag_context=RAG)
+    question = await LLMService.decide_next_step(history("help"))
+    escalation = await LLMService.decide_next_step(history("Our site is down with a 500 error, urgent!"))
+    classification = await LLMService.classify_message("Our site is down with a 500 error, urgent!")
+    tokens = []
+
+    async def on_token(text):
+        tokens.append(text)
+
+    streamed = await LLMService.stream_next_step(history("When is your office open on Thursday?"), on_token,
+                                                 rag_context=RAG)
+    return answer, question, escalation, classification, streamed, "".join(tokens)
+
+
+def test_fake_groq_in_process():
+    print("\n--- 🧪 Fake Groq (in-process) ---")
+    fake = FakeGroq(latency_ms=5, tokens_per_s=10000, seed=0)
+    with mock.patch.object(LLMService, "_client", LLMService._build_client("fake", transport=fake.transport())), \
+            mock.patch.object(LLMService, "_breaker", CircuitBreaker()), \
+            mock.patch.object(LLMService, "_classification_cache", llm_service.LRUCache(16)), \
+            mock.patch.object(llm_service, "LLM_COMBINED_DECISION", True):
+        answer, question, escalation, classification, streamed, tokens = asyncio.run(exercise())
+
+    print(f"answer: {answer['text']} | question: {question['action']} | escalation: {escalation.get('classification', {}).get('department')}")
+    assert answer["action"] == "answer" and "Sunday to Thursday" in answer["text"]
+    assert question["action"] == "ask_question"
+    assert escalation["action"] == "escalate" and escalation["classification"]["priority"] == "high"
+    assert classification["department"] == "web" and classification["priority"] == "high"
+    assert streamed == answer and tokens == answer["text"]
+    assert fake.counts["ok"] == 5
+
+
+def test_fake_groq_errors_and_rate_limits():
+    print("\n--- 🧪 Fake Groq errors / 429 bursts ---")
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    for fake, expected in ((FakeGroq(latency_ms=1, error_rate=1.0, seed=0), "errors"),
+                           (FakeGroq(latency_ms=1, rate_limit_rate=1.0, burst_s=3, seed=0), "rate_limited")):
+        sleeps.clear()
+        with mock.patch.object(LLMService, "_client", LLMService._build_client("fake", transport=fake.transport())), \
+                mock.patch.object(LLMService, "_breaker", CircuitBreaker()), \
+                mock.patch.object(llm_service.asyncio, "sleep", fake_sleep):
+            result = asyncio.run(LLMService.decide_next_step(history("hello there friend")))
+        print(f"{expected}: {fake.counts} | retry waits {[round(s, 2) for s in sleeps]}")
+        assert result.get("fallback")
+        assert fake.counts[expected] == llm_service.LLM_MAX_RETRIES + 1
+        if expected == "rate_limited":
+            # Retry-After = time left in the burst
+            assert all(0 < s <= 3 for s in sleeps)
+
+
+def test_llm_service_points_at_fake_server():
+    print("\n--- 🧪 Fake Groq server via LLM_BASE_URL ---")
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    fake = FakeGroq(latency_ms=5, seed=0)
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    try:
+        with mock.patch.object(llm_service, "LLM_BASE_URL", f"http://127.0.0.1:{port}"), \
+                mock.patch.dict(os.environ, {"GROQ_API_KEY": ""}), \
+                mock.patch.object(LLMService, "_client", None), \
+                mock.patch.object(LLMService, "_breaker", CircuitBreaker()):
+            result = asyncio.run(LLMService.decide_next_step(history("Where is your office located?"), rag_context=RAG))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    print(f"Result: {result} | Server counts: {fake.counts}")
+    assert result["action"] == "answer" and fake.counts["ok"] == 1
+
+
+if __name__ == "__main__":
+    test_fake_groq_in_process()
+    test_fake_groq_errors_and_rate_limits()
+    test_llm_service_points_at_fake_server()
@@ -0,0 +1,213 @@
+import sys
+import os
+import asyncio
+import tempfile
+from unittest import mock
+from sqlmodel import SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.llm_service as llm_service
+import app.services.history_service as history_service
+import app.services.ai_service as ai_service
+from app.services.history_service import HistoryService, window, message_tokens, estimate_tokens
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.vector_service import VectorService
+from app.services.ai_service import AIService
+from app.models.models import ChatMessage, ChatSummary
+from fakes import FakeGroqClient
+
+BUDGET = 300
+N_TURNS = 30
+
+
+class Recorder:
+    """Answers every decision; summaries list the numbered turns they cover."""
+
+    def __init__(self):
+        self.decisions = []  # conversation part of each decision prompt
+        self.summaries = []  # (previous summary, new messages, returned summary) per summary call
+
+    def reply(self, messages):
+        system = messages[0]["content"]
+        if "running summary" in system:
+            previous, new = messages[-1]["content"].split("\n\nNEW MESSAGES:\n")
+            turns = [line.split(":")[1].split()[1] for line in new.splitlines() if line.startswith("USER: turn")]
+            content = f"Summary #{len(self.summaries) + 1}: dashboard export failures, turns up to {turns[-1]}"
+            self.summaries.append((previous.split("PREVIOUS SUMMARY:\n")[-1], new, content))
+            return content
+        summary = system.split("=== CONVERSATION SO FAR (summary of earlier messages) ===\n")[-1] \
+            if "=== CONVERSATION SO FAR" in system else ""
+        self.decisions.append(estimate_tokens(summary) + sum(message_tokens(m) for m in messages[1:]))
+        return {"action": "ask_question", "text": "Could you share more details?", "reasoning": "x"}
+
+
+def user_lines(transcript):
+    return {line for line in transcript.splitlines() if line.startswith("USER:")}
+
+
+async def no_matches(queries, k=3, threshold=0.35, filters=None):
+    return [[] for _ in queries]
+
+
+async def long_session(db_url):
+    engine = create_async_engine(db_url)
+    for turn in range(N_TURNS):
+        # Mix of short and long messages
+        message = f"turn {turn}: " + ("my dashboard export fails again " * (10 if turn % 4 == 0 else 2))
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await AIService.process_message(message, "long-session", session)
+    async with AsyncSession(engine) as session:
+        row = (await session.exec(select(ChatSummary).where(ChatSummary.session_id == "long-session"))).first()
+    await engine.dispose()
+    return row
+
+
+def test_window_fills_budget_from_newest():
+    print("\n--- 🪟 Token-budgeted history window ---")
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * (i + 1)} for i in range(10)]
+    kept = window(history, 100)
+    assert kept == history[-len(kept):]
+    assert sum(message_tokens(m) for m in kept) <= 100
+    assert sum(message_tokens(m) for m in history[-len(kept) - 1:]) > 100
+
+    # The latest message always goes in, truncated when it alone is over budget
+    huge = [{"role": "user", "content": "x" * 10000}]
+    kept = window(huge, 50)
+    assert len(kept) == 1 and message_tokens(kept[0]) <= 50
+
+
+def test_long_session_prompt_stays_bounded():
+    print(f"\n--- 🗜️ {N_TURNS}-turn session with a {BUDGET}-token history budget ---")
+    recorder = Recorder()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        SQLModel.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+        with mock.patch.object(history_service, "HISTORY_TOKEN_BUDGET", BUDGET), \
+                mock.patch.object(llm_service, "HISTORY_TOKEN_BUDGET", BUDGET), \
+                mock.patch.object(ai_service, "ANSWER_CACHE_ENABLED", False), \
+                mock.patch.object(VectorService, "asearch_many", no_matches), \
+                mock.patch.object(LLMService, "_client", FakeGroqClient(recorder.reply)), \
+                mock.patch.object(LLMService, "_breaker", CircuitBreaker()):
+            row = asyncio.run(long_session(f"sqlite+aiosqlite:///{db_path}"))
+
+    print(f"Conversation tokens per decision: max {max(recorder.decisions)} | last 5 {recorder.decisions[-5:]}")
+    print(f"Summary calls: {len(recorder.summaries)} | Summary: {row.summary!r} (until message {row.summarized_until})")
+    assert len(recorder.decisions) == N_TURNS
+    assert max(recorder.decisions) <= BUDGET
+    # Amortized: the summary is extended every few turns, not on every message
+    assert 1 < len(recorder.summaries) < N_TURNS / 2
+    # Incremental: each call gets the previous summary and only messages it has not seen
+    assert recorder.summaries[0][0] == "(none)"
+    for (_, new_a, returned_a), (previous_b, new_b, _) in zip(recorder.summaries, recorder.summaries[1:]):
+        assert previous_b == returned_a
+        assert not user_lines(new_a) & user_lines(new_b)
+    # Persisted next to the messages
+    assert row is not None and row.summary == recorder.summaries[-1][2] and row.summarized_until > 0
+
+
+async def seed_session(engine, session_id, contents):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        for i, content in enumerate(contents):
+            session.add(ChatMessage(session_id=session_id, role="user" if i % 2 == 0 else "assistant", content=content))
+        await session.commit()
+
+
+def run_with_db(scenario):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "test.db")
+        SQLModel.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+
+        async def run():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+            try:
+                return await scenario(engine)
+            finally:
+                await engine.dispose()
+
+        with mock.patch.object(history_service, "HISTORY_TOKEN_BUDGET", BUDGET), \
+                mock.patch.object(llm_service, "HISTORY_TOKEN_BUDGET", BUDGET):
+            return asyncio.run(run())
+
+
+def test_fast_path_turn_skips_summary():
+    print("\n--- ⚡ Over-budget session answered from the KB ---")
+    calls = []
+
+    async def summarize(previous, messages):
+        calls.append(messages)
+        return "summary"
+
+    async def kb_hit(queries, k=3, threshold=0.35, filters=None):
+        return [[{"doc": {"text": "We are open Sunday to Thursday.", "category": "general"}, "score": 0.95}]]
+
+    async def scenario(engine):
+        await seed_session(engine, "fast", ["my dashboard export fails again " * 20] * 6)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            return await AIService.process_message("When are you open?", "fast", session)
+
+    with mock.patch.object(LLMService, "summarize_history", summarize), \
+            mock.patch.object(VectorService, "asearch_many", kb_hit):
+        result = run_with_db(scenario)
+    assert result["source"] == "vector_db" and calls == []
+
+
+def test_summary_input_is_bounded():
+    print("\n--- 📏 Summarizer input cap ---")
+    calls = []
+
+    async def summarize(previous, messages):
+        calls.append(sum(message_tokens(m) for m in messages))
+        return f"summary {len(calls)}"
+
+    async def scenario(engine):
+        # One huge message, then a backlog far beyond the summarizer's input budget
+        await seed_session(engine, "huge", ["x" * 100000] + [f"message {i} " * 200 for i in range(12)] + ["latest"])
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            for _ in range(3):
+                history, summary = await HistoryService.load("huge", session)
+        return history, summary
+
+    with mock.patch.object(LLMService, "summarize_history", summarize), \
+            mock.patch.object(history_service, "SUMMARY_INPUT_TOKEN_BUDGET", 1000):
+        history, summary = run_with_db(scenario)
+    print(f"Summarizer input tokens per call: {calls}")
+    assert len(calls) == 3 and max(calls) <= 1000
+    assert summary == "summary 3" and history[-1]["content"] == "latest"
+
+
+def test_concurrent_first_summary():
+    print("\n--- 🏁 Two turns creating the same session summary ---")
+
+    def racing_summarizer(engine, rival_until):
+        async def summarize(previous, messages):
+            # The other turn commits its summary row while this one waits on the LLM
+            async with AsyncSession(engine) as other:
+                other.add(ChatSummary(session_id="race", summary="rival", summarized_until=rival_until))
+                await other.commit()
+            return "ours"
+        return summarize
+
+    for rival_until, expected in ((1, "ours"), (10**6, "rival")):
+        async def scenario(engine):
+            await seed_session(engine, "race", ["my dashboard export fails again " * 20] * 6)
+            with mock.patch.object(LLMService, "summarize_history", racing_summarizer(engine, rival_until)):
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    _, summary = await HistoryService.load("race", session)
+            async with AsyncSession(engine) as session:
+                rows = (await session.exec(select(ChatSummary).where(ChatSummary.session_id == "race"))).all()
+            return summary, [row.summary for row in rows]
+
+        summary, rows = run_with_db(scenario)
+        print(f"Rival covers up to {rival_until}: served {summary!r}, stored {rows}")
+        assert summary == expected and rows == [expected]
+
+
+if __name__ == "__main__":
+    test_window_fills_budget_from_newest()
+    test_long_session_prompt_stays_bounded()
+    test_fast_path_turn_skips_summary()
+    test_summary_input_is_bounded()
+    test_concurrent_first_summary()
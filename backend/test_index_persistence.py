@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.vector_service as vector_service
+from app.services.vector_service import VectorService, INDEX_FORMAT, INDEX_MANIFEST_FILE, INDEX_VECTORS_FILE
+from fakes import FakeEmbedder
+
+DIM = 32
+
+
+def write_kb(path, docs):
+    with open(path, "w") as f:
+        json.dump(docs, f)
+
+
+def restart(model):
+    """Rebuild as a fresh process would: no live index, only what is on disk."""
+    VectorService._index = None
+    return VectorService._rebuild_index(model)
+
+
+def test_index_persistence():
+    print("\n--- 💾 Persisted KB index ---")
+    docs = [{"id": i, "text": f"answer {i}", "question_variant": f"question {i}"} for i in range(10)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_path, index_dir = os.path.join(tmp, "knowledge_base.json"), os.path.join(tmp, "kb_index")
+        manifest_path = os.path.join(index_dir, INDEX_MANIFEST_FILE)
+        vectors_path = os.path.join(index_dir, INDEX_VECTORS_FILE)
+        write_kb(kb_path, docs)
+
+        with mock.patch.object(vector_service, "KB_PATH", kb_path), \
+                mock.patch.object(vector_service, "INDEX_DIR", index_dir), \
+                mock.patch.object(VectorService, "_index", None), \
+                mock.patch.object(VectorService, "_kb_data", []), \
+                mock.patch.object(VectorService, "_kb_vectors", None), \
+                mock.patch.object(VectorService, "_kb_mtime", None), \
+                mock.patch.object(VectorService, "_model_name", "model-a"):
+            # First start: everything is encoded and saved with its manifest
+            assert restart(FakeEmbedder(dim=DIM))["encoded"] == 20
+            built = VectorService._index
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            assert manifest["format"] == INDEX_FORMAT and manifest["model"] == "model-a"
+            assert manifest["kb_hash"] == built.kb_hash and manifest["row_hashes"] == built.row_hashes
+            assert manifest["dim"] == DIM and manifest["count"] == 20
+
+            # Reload from disk: same vectors, memory-mapped, nothing encoded
+            loaded = VectorService._load_index(DIM)
+            assert isinstance(loaded[0], np.memmap) and loaded[2] == built.kb_hash
+            assert np.array_equal(loaded[0], built.vectors)
+            model = FakeEmbedder(dim=DIM)
+            assert restart(model)["encoded"] == 0 and model.encoded == []
+            reused = VectorService._index.vectors
+            assert isinstance(reused.base, np.memmap) and not reused.flags.writeable
+            assert np.array_equal(reused, built.vectors)
+
+            # Edited KB (new kb hash): only the changed text is encoded, the index is re-saved
+            docs[3]["text"] = "answer 3, now with opening hours"
+            write_kb(kb_path, docs)
+            model = FakeEmbedder(dim=DIM)
+            assert restart(model)["encoded"] == 1 and model.encoded == [docs[3]["text"]]
+            with open(manifest_path) as f:
+                assert json.load(f)["kb_hash"] == VectorService._index.kb_hash != built.kb_hash
+
+            # Other model, older format, truncated manifest or corrupt file: full rebuild
+            def stale_manifest(**changes):
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                manifest.update(changes)
+                with open(manifest_path, "w") as f:
+                    json.dump(manifest, f)
+
+            def corrupt_vectors():
+                with open(vectors_path, "wb") as f:
+                    f.write(b"not a numpy file")
+
+            for name, break_index in (
+                    ("model", lambda: setattr(VectorService, "_model_name", "model-b")),
+                    ("format", lambda: stale_manifest(format=INDEX_FORMAT - 1)),
+                    ("shape", lambda: stale_manifest(row_hashes=manifest["row_hashes"][:-1])),
+                    ("corrupt", corrupt_vectors)):
+                break_index()
+                assert VectorService._load_index(DIM) is None, name
+                model = FakeEmbedder(dim=DIM)
+                result = restart(model)
+                print(f"{name}: {result}")
+                assert result["encoded"] == 20 and len(model.encoded) == 20, name
+                # ... and the rebuilt index is valid again
+                assert VectorService._load_index(DIM)[2] == VectorService._index.kb_hash, name
+                with open(manifest_path) as f:
+                    assert json.load(f)["model"] == VectorService._model_name
+
+
+if __name__ == "__main__":
+    test_index_persistence()
+    print("\n✅ Index persistence tests passed")
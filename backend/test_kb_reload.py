@@ -0,0 +1,125 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.vector_service as vector_service
+from app.services.vector_service import VectorService
+from app.services.cache import LRUCache
+from fakes import FakeEmbedder, hash_vectors
+
+DIM = 32
+QUERY = "answer 2"  # same text as doc 2, so doc 2 is its best match
+
+
+class StopWatcher(BaseException):
+    """Ends the watcher loop (it only catches Exception)."""
+
+
+class BlockingEmbedder(FakeEmbedder):
+    """Encoding QUERY blocks until `release` is set (and is not recorded in `encoded`)."""
+
+    def __init__(self):
+        super().__init__(dim=DIM)
+        self.searching = threading.Event()
+        self.release = threading.Event()
+
+    def encode(self, texts):
+        if texts != [QUERY]:
+            return super().encode(texts)
+        self.searching.set()
+        assert self.release.wait(10)
+        return hash_vectors(texts, DIM)
+
+
+def write_kb(path, docs):
+    """Writes the KB and moves its mtime forward, so the watcher sees every edit."""
+    mtime = os.path.getmtime(path) + 1 if os.path.exists(path) else time.time()
+    with open(path, "w") as f:
+        json.dump(docs, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_watcher_reembeds_only_changed_rows():
+    print("\n--- 🔄 KB hot reload ---")
+    docs = [{"id": i, "text": f"answer {i}", "question_variant": f"question {i}", "category": "support"}
+            for i in range(6)]
+    model = BlockingEmbedder()
+    snapshots, results = [], []
+
+    def edit_texts():
+        docs[1]["text"] = "answer 1, edited"
+        docs.append({"id": 6, "text": "answer 6", "question_variant": "question 6", "category": "support"})
+        del docs[2]
+        write_kb(kb_path, docs)
+
+    def edit_metadata():
+        docs[0]["category"] = "commercial"  # not an embedded field
+        write_kb(kb_path, docs)
+
+    steps = [edit_texts, edit_metadata, lambda: None]
+
+    def fake_sleep(seconds):
+        snapshots.append((VectorService._index, list(model.encoded)))
+        if not steps:
+            raise StopWatcher()
+        steps.pop(0)()
+
+    def search():
+        results.append(VectorService.search_many([QUERY], k=1)[0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_path = os.path.join(tmp, "knowledge_base.json")
+        write_kb(kb_path, docs)
+
+        with mock.patch.object(vector_service, "KB_PATH", kb_path), \
+                mock.patch.object(vector_service, "INDEX_DIR", os.path.join(tmp, "kb_index")), \
+                mock.patch.object(vector_service, "time", SimpleNamespace(sleep=fake_sleep, perf_counter=time.perf_counter)), \
+                mock.patch.object(VectorService, "_model", model), \
+                mock.patch.object(VectorService, "_batcher", None), \
+                mock.patch.object(VectorService, "_query_cache", LRUCache(16)), \
+                mock.patch.object(VectorService, "_index", None), \
+                mock.patch.object(VectorService, "_kb_data", []), \
+                mock.patch.object(VectorService, "_kb_vectors", None), \
+                mock.patch.object(VectorService, "_kb_mtime", None):
+            VectorService._rebuild_index(model)
+            first = VectorService._index
+
+            # A search picks up the current snapshot, then blocks while encoding its query
+            searcher = threading.Thread(target=search)
+            searcher.start()
+            assert model.searching.wait(10)
+
+            try:
+                VectorService._watch_kb()
+            except StopWatcher:
+                pass
+            model.release.set()
+            searcher.join(10)
+            after = VectorService.search_many([QUERY], k=1)[0]
+
+    (start, initial), (edited, after_edit), (retagged, after_retag), (idle, after_idle) = snapshots
+    new_rows = after_edit[len(initial):]
+    print(f"Re-embedded after edit: {new_rows} | after metadata edit: {after_retag[len(after_edit):]}")
+
+    # Initial build embeds every view; the text edit only the changed and added ones
+    assert start is first and len(initial) == 12
+    assert new_rows == ["answer 1, edited", "answer 6", "question 6"]
+    assert [d["id"] for d in edited.docs] == [0, 1, 3, 4, 5, 6]
+    # Metadata-only edit: new snapshot, nothing encoded; no edit: no reload at all
+    assert retagged is not edited and retagged.docs[0]["category"] == "commercial" and after_retag == after_edit
+    assert idle is retagged and after_idle == after_retag
+
+    # The in-flight search finished on the snapshot it started with (doc 2 still there)
+    assert results[0][0]["doc"]["id"] == 2
+    assert all(match["doc"]["id"] != 2 for match in after)
+
+
+if __name__ == "__main__":
+    test_watcher_reembeds_only_changed_rows()
+    print("\n✅ KB reload tests passed")
@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
 
 from app.services.llm_service import LLMService
@@ -82,7 +83,7 @@ def test_llm_classification():
         print(f"Message: \"{test['message']}\"")
         
         try:
-            result = LLMService.classify_message(test['message'])
+            result = asyncio.run(LLMService.classify_message(test['message']))
             
             print(f"\n✅ Result:")
             print(f"   Department: {result['department']} (Expected: {test['expected_dept']})")
@@ -0,0 +1,111 @@
+import sys
+import os
+import time
+import asyncio
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.llm_service import LLMService
+from app.services.llm_gateway import LLMGateway
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.fake_groq import FakeGroq
+
+
+def test_priority_order_and_metrics():
+    print("\n--- 🚦 Gateway priority queue ---")
+    gateway = LLMGateway(max_concurrency=1, tpm_budget=0)
+    granted = []
+
+    async def request(name, priority):
+        ticket = await gateway.acquire(priority)
+        granted.append(name)
+        await asyncio.sleep(0.01)
+        gateway.release(ticket)
+
+    async def burst():
+        holder = await gateway.acquire(LLMGateway.PRIORITY_NEW)
+        tasks = [asyncio.create_task(request(name, priority)) for name, priority in (
+            ("new-1", LLMGateway.PRIORITY_NEW), ("session", LLMGateway.PRIORITY_SESSION),
+            ("new-2", LLMGateway.PRIORITY_NEW), ("escalation", LLMGateway.PRIORITY_ESCALATION))]
+        # A cancelled waiter gives up its place without blocking the queue
+        cancelled = asyncio.create_task(request("cancelled", LLMGateway.PRIORITY_ESCALATION))
+        await asyncio.sleep(0.01)
+        depth = gateway.depth
+        cancelled.cancel()
+        gateway.release(holder)
+        await asyncio.gather(*tasks)
+        return depth
+
+    depth = asyncio.run(burst())
+    stats = gateway.stats()
+    print(f"Grant order: {granted}\nStats: {stats}")
+    assert depth == 5
+    assert granted == ["escalation", "session", "new-1", "new-2"]
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0 and stats["max_queue_depth"] == 5
+    assert stats["queued_by_priority"] == {"escalation": 2, "session": 1, "new": 2}
+    assert stats["wait_ms"]["max"] >= 40  # new-2 waited for three 10 ms requests ahead of it
+
+
+def test_tokens_per_minute_budget():
+    print("\n--- 🪙 Gateway TPM budget ---")
+    gateway = LLMGateway(max_concurrency=0, tpm_budget=60000)  # refills 1000 tokens/s
+
+    async def spend():
+        big = await gateway.acquire(LLMGateway.PRIORITY_NEW, tokens=59800)
+        start = time.perf_counter()
+        small = await gateway.acquire(LLMGateway.PRIORITY_NEW, tokens=500)  # needs ~0.3 s of refill
+        waited = time.perf_counter() - start
+        gateway.release(big, used_tokens=800)  # far below the estimate: the difference is refunded
+        gateway.release(small, used_tokens=500)
+        return waited
+
+    waited = asyncio.run(spend())
+    stats = gateway.stats()
+    print(f"Waited {waited * 1000:.0f} ms for tokens | available after refund: {stats['tokens_available']}")
+    assert 0.2 <= waited <= 1.0
+    assert stats["tokens_available"] >= 59000
+
+
+def test_llm_service_burst_through_gateway():
+    print("\n--- 📈 LLMService burst: escalations and running chats first ---")
+    fake = FakeGroq(latency_ms=40, latency_sigma=0, seed=1)
+    gateway = LLMGateway(max_concurrency=2, tpm_budget=0)
+    done = []
+
+    async def call(name, coro):
+        await coro
+        done.append(name)
+
+    async def on_token(text):
+        pass
+
+    async def burst():
+        new_chat = [{"role": "user", "content": "Where is your office located?"}]
+        running = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"},
+                   {"role": "user", "content": "And your working hours?"}]
+        tasks = [asyncio.create_task(call(f"new-{i}", LLMService.decide_next_step(new_chat))) for i in range(6)]
+        tasks.append(asyncio.create_task(call("stream", LLMService.stream_next_step(new_chat, on_token))))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("running", LLMService.decide_next_step(running))))
+        tasks.append(asyncio.create_task(call("classify", LLMService.classify_message("Checkout is down, urgent"))))
+        await asyncio.gather(*tasks)
+
+    with mock.patch.object(LLMService, "_client", LLMService._build_client("fake", transport=fake.transport())), \
+            mock.patch.object(LLMService, "_gateway", gateway), \
+            mock.patch.object(LLMService, "_breaker", CircuitBreaker(enabled=False)):
+        asyncio.run(burst())
+        stats = LLMService.stats()["gateway"]
+
+    print(f"Completion order: {done}\nGateway: {stats}")
+    # Queued behind the two first new chats, but served before the other new ones
+    assert set(done[2:4]) == {"classify", "running"}
+    assert stats["in_flight"] == 0  # the streamed call gave its slot back too
+    assert stats["max_queue_depth"] == 7 and stats["granted"] == 9
+    assert stats["queued_by_priority"] == {"escalation": 1, "session": 1, "new": 5}
+
+
+if __name__ == "__main__":
+    test_priority_order_and_metrics()
+    test_tokens_per_minute_budget()
+    test_llm_service_burst_through_gateway()
+    print("\n✅ LLM gateway tests passed")
@@ -0,0 +1,90 @@
+import sys
+import os
+import json
+import asyncio
+from unittest import mock
+import httpx
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.llm_service as llm_service
+from app.services.llm_service import LLMService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_gateway import LLMGateway
+
+ANSWER = {"action": "answer", "text": "We are open 9-5.", "reasoning": "kb"}
+
+
+def completion(content: dict) -> httpx.Response:
+    return httpx.Response(200, json={
+        "id": "cmpl-1", "object": "chat.completion", "created": 0, "model": "llama-3.3-70b-versatile",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": json.dumps(content)}}],
+    })
+
+
+def scripted_client(responses):
+    """Groq client whose HTTP calls return `responses` in order (then keep answering)."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) <= len(responses):
+            return responses[len(requests) - 1]
+        return completion(ANSWER)
+
+    return LLMService._build_client("test-key", transport=httpx.MockTransport(handler)), requests
+
+
+def decide(client, sleeps):
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    # Own breaker and gateway: the failures scripted here must not leak into other tests
+    with mock.patch.object(LLMService, "_client", client), \
+            mock.patch.object(LLMService, "_breaker", CircuitBreaker()), \
+            mock.patch.object(LLMService, "_gateway", LLMGateway()), \
+            mock.patch.object(llm_service.asyncio, "sleep", fake_sleep):
+        return asyncio.run(LLMService.decide_next_step([{"role": "user", "content": "When are you open?"}]))
+
+
+def test_transient_errors_are_retried():
+    print("\n--- 🔁 Groq retries with backoff ---")
+
+    # 429 with Retry-After, then a 503: both retried, the Retry-After wait is honoured
+    sleeps = []
+    client, requests = scripted_client([
+        httpx.Response(429, headers={"retry-after": "1.5"}, json={"error": {"message": "rate limited"}}),
+        httpx.Response(503, json={"error": {"message": "over capacity"}}),
+    ])
+    result = decide(client, sleeps)
+    print(f"Attempts: {len(requests)} | Waits: {sleeps} | Result: {result['text']}")
+    assert result == ANSWER
+    assert len(requests) == 3
+    assert sleeps[0] == 1.5
+    assert 0 <= sleeps[1] <= llm_service.LLM_RETRY_BASE_DELAY * 2
+
+    # Persistent 500s: bounded retries, then the fallback reply
+    sleeps = []
+    client, requests = scripted_client([httpx.Response(500, json={"error": {"message": "boom"}})] * 10)
+    result = decide(client, sleeps)
+    print(f"Attempts: {len(requests)} | Waits: {[round(s, 3) for s in sleeps]} | Result: {result['text']}")
+    assert len(requests) == llm_service.LLM_MAX_RETRIES + 1
+    assert result.get("fallback")
+    assert all(0 <= s <= min(llm_service.LLM_RETRY_MAX_DELAY, llm_service.LLM_RETRY_BASE_DELAY * 2 ** i)
+               for i, s in enumerate(sleeps))
+
+    # Client errors and Retry-After beyond LLM_RETRY_MAX_DELAY are not retried
+    for response in (httpx.Response(400, json={"error": {"message": "bad request"}}),
+                     httpx.Response(429, headers={"retry-after": "600"}, json={"error": {"message": "quota"}})):
+        sleeps = []
+        client, requests = scripted_client([response])
+        result = decide(client, sleeps)
+        assert len(requests) == 1 and not sleeps and result.get("fallback")
+
+    stats = LLMService.stats()
+    print(f"Stats: {stats}")
+    assert stats["retry_reasons"]["429"] >= 1 and stats["retry_reasons"]["500"] >= llm_service.LLM_MAX_RETRIES
+
+
+if __name__ == "__main__":
+    test_transient_errors_are_retried()
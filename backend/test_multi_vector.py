@@ -0,0 +1,55 @@
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.vector_service import VectorService, KBIndex, doc_views
+
+
+def kb_with_uneven_views(n=50, dim=16, seed=0):
+    """Every third entry has no question_variant, so entries have one or two rows."""
+    rng = np.random.default_rng(seed)
+    docs = [{"id": i, "text": f"answer {i}", **({"question_variant": f"question {i}"} if i % 3 else {})}
+            for i in range(n)]
+    n_rows = sum(len(doc_views(doc)) for doc in docs)
+    vectors = rng.standard_normal((n_rows, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return docs, vectors, rng
+
+
+def test_pool_is_max_over_each_entrys_rows():
+    print("\n--- 🧮 Multi-vector max-pool ---")
+    docs, vectors, rng = kb_with_uneven_views()
+    index = KBIndex(docs, vectors, [str(i) for i in range(len(vectors))], "kb", ann_backend="exact")
+    queries = rng.standard_normal((4, vectors.shape[1])).astype(np.float32)
+    row_scores = queries @ vectors.T
+
+    # Reference: walk the rows entry by entry
+    expected, row = np.empty((4, len(docs)), dtype=np.float32), 0
+    for i, doc in enumerate(docs):
+        n_views = len(doc_views(doc))
+        expected[:, i] = row_scores[:, row:row + n_views].max(axis=1)
+        row += n_views
+    print(f"{len(docs)} entries / {len(vectors)} rows | row_ptr[:6] = {index.row_ptr[:6].tolist()}")
+
+    assert index.row_ptr[-1] == len(vectors) and index.max_views == 2
+    assert np.allclose(index.pool(row_scores), expected)
+    # Single-query path (reused buffers) and batched path agree
+    assert np.allclose(VectorService._semantic_scores(index, queries), expected, atol=1e-6)
+    assert np.allclose(VectorService._semantic_scores(index, queries[:1]), expected[:1], atol=1e-6)
+
+    # Subsets in any order: rows grouped per entry, scores pooled per entry
+    doc_ids = np.array([7, 0, 3, 49, 2])
+    rows, sizes = index.rows_of(doc_ids)
+    assert sizes.tolist() == [2, 1, 1, 2, 2]
+    assert rows.tolist() == [r for i in doc_ids for r in range(index.row_ptr[i], index.row_ptr[i + 1])]
+    assert np.allclose(index.doc_scores(doc_ids, queries[0]), expected[0, doc_ids], atol=1e-6)
+
+    # One row per entry: pooling is a no-op
+    single = KBIndex([{"id": 0, "text": "a"}, {"id": 1, "text": "b"}], vectors[:2], ["0", "1"], "kb")
+    assert np.array_equal(single.pool(row_scores[:, :2]), row_scores[:, :2])
+
+
+if __name__ == "__main__":
+    test_pool_is_max_over_each_entrys_rows()
+    print("\n✅ Multi-vector tests passed")
@@ -1,8 +1,9 @@
 import requests
+import os
 import uuid
 import time
 
-API_URL = "http://localhost:8000/api/chat/"
+API_URL = os.getenv("CHAT_API_URL", "http://localhost:8000/api/chat/")
 
 def chat(message, session_id):
     print(f"\n👤 User: {message}")
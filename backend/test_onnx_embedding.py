@@ -0,0 +1,72 @@
+import sys
+import os
+import json
+import tempfile
+import socket
+import unittest
+import numpy as np
+
+# Add BACKEND directory to path (so 'app' is top-level)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.vector_service import VectorService, KB_PATH, SentenceTransformer
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+
+def model_available(name):
+    """Local path, cached, or the Hugging Face Hub is reachable (an offline download retries for minutes)."""
+    from huggingface_hub import try_to_load_from_cache
+    repo = name if "/" in name else f"sentence-transformers/{name}"
+    if os.path.isdir(name) or isinstance(try_to_load_from_cache(repo, "config.json"), str):
+        return True
+    try:
+        socket.create_connection(("huggingface.co", 443), timeout=3).close()
+        return True
+    except OSError:
+        return False
+
+
+def test_onnx_vectors_match_pytorch():
+    print(f"\n--- ⚙️ ONNX vs PyTorch embeddings ({MODEL_NAME}) ---")
+    try:
+        from app.services.onnx_embedder import OnnxEmbedder
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        raise unittest.SkipTest("onnxruntime not installed")
+
+    with open(KB_PATH, 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+    texts = [doc['text'] for doc in docs[:64]] + [doc['question_variant'] for doc in docs[-64:] if doc.get('question_variant')]
+    texts += ["hi", "Where is ZEdny HQ located? " * 100]  # very short + truncated inputs
+    texts = list(dict.fromkeys(texts))
+
+    # Skipped, not passed: the parity check never ran
+    if not model_available(MODEL_NAME):
+        raise unittest.SkipTest(f"{MODEL_NAME} is not cached and the Hugging Face Hub is unreachable")
+    try:
+        model = SentenceTransformer(MODEL_NAME)
+    except OSError as e:
+        raise unittest.SkipTest(f"could not load {MODEL_NAME}: {e}")
+    reference = VectorService._normalize(model.encode(texts))
+
+    with tempfile.TemporaryDirectory() as onnx_dir:
+        for quantize, min_cosine in ((False, 0.9999), (True, 0.98)):
+            embedder = OnnxEmbedder(MODEL_NAME, quantize=quantize, onnx_dir=onnx_dir)
+            vectors = VectorService._normalize(embedder.encode(texts))
+            cosine = (vectors * reference).sum(axis=1)
+
+            # Same nearest KB text for every query as with PyTorch vectors
+            top1_agreement = np.mean((vectors @ reference.T).argmax(axis=1) == np.arange(len(texts)))
+            print(f"{'int8' if quantize else 'fp32'}: min cosine {cosine.min():.5f} | top-1 agreement {top1_agreement:.3f}")
+            assert vectors.shape == reference.shape
+            assert cosine.min() >= min_cosine
+            if not quantize:
+                assert top1_agreement == 1.0
+
+
+if __name__ == "__main__":
+    try:
+        test_onnx_vectors_match_pytorch()
+    except unittest.SkipTest as e:
+        print(f"⚠️ Skipped: {e}")
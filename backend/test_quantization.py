@@ -0,0 +1,89 @@
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+import app.services.vector_service as vector_service
+from app.services.vector_service import VectorService, KBIndex, doc_views
+from app.services.quantization import QuantizedVectors
+from fakes import FakeEmbedder
+
+DIM = 384
+
+
+def clustered_vectors(n, topics, rng):
+    """Unit vectors around topic centres (FAQ embeddings are close to each other, not uniform)."""
+    vectors = topics[rng.integers(0, topics.shape[0], size=n)]
+    vectors += 0.6 * rng.standard_normal(vectors.shape, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_quantized_scores_match_float32():
+    print("\n--- 📏 float16 / int8 vs float32 scores ---")
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((20, DIM), dtype=np.float32)
+    kb, queries = clustered_vectors(4000, topics, rng), clustered_vectors(100, topics, rng)
+    exact = queries @ kb.T
+    exact_top = np.argsort(-exact, axis=1)[:, :10]
+
+    for mode, max_error, min_agreement in (("float16", 1e-3, 0.99), ("int8", 5e-3, 0.95)):
+        store = QuantizedVectors(kb, mode)
+        scores = store.scores(queries)
+        # Single-query path (dot) must agree with the batched one
+        assert np.allclose(store.dot(queries[0], np.empty(len(kb), dtype=np.float32)), scores[0], atol=1e-5)
+
+        error = float(np.abs(scores - exact).max())
+        top = np.argsort(-scores, axis=1)[:, :10]
+        agreement = float(np.mean([len(np.intersect1d(a, b)) / 10 for a, b in zip(top, exact_top)]))
+        top1 = float(np.mean(top[:, 0] == exact_top[:, 0]))
+        print(f"{mode}: {store.nbytes / kb.nbytes:.2f}x memory | max score error {error:.5f} | "
+              f"top-10 agreement {agreement:.3f} | top-1 {top1:.2f}")
+        assert error < max_error
+        assert agreement >= min_agreement
+
+
+def test_rebuild_from_quantized_store_is_not_persisted():
+    print("\n--- 💾 Only encoder float32 vectors are persisted ---")
+    docs = [{"id": i, "text": f"answer {i}", "question_variant": f"question {i}", "category": "support"}
+            for i in range(20)]
+    model = FakeEmbedder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_path, index_dir = os.path.join(tmp, "knowledge_base.json"), os.path.join(tmp, "kb_index")
+        with open(kb_path, "w") as f:
+            json.dump(docs + [{"id": 20, "text": "answer 20", "category": "support"}], f)
+
+        # Live int8 index, no persisted index to reuse float32 rows from
+        texts = [text for doc in docs for _, text in doc_views(doc)]
+        hashes = [VectorService._text_hash(t) for t in texts]
+        live = KBIndex(docs, VectorService._normalize(model.encode(texts)), hashes,
+                       VectorService._kb_hash(hashes), storage="int8")
+        model.encoded.clear()
+
+        with mock.patch.object(vector_service, "KB_PATH", kb_path), \
+                mock.patch.object(vector_service, "INDEX_DIR", index_dir), \
+                mock.patch.object(VectorService, "_index", live), \
+                mock.patch.object(VectorService, "_kb_data", []), \
+                mock.patch.object(VectorService, "_kb_vectors", None), \
+                mock.patch.object(VectorService, "_kb_mtime", None):
+            result = VectorService._rebuild_index(model)
+            saved_after_edit = os.path.exists(index_dir)
+
+            # A full re-encode is all encoder output again: that one may be saved
+            VectorService._index = None
+            VectorService._rebuild_index(model)
+            saved_after_full = os.path.exists(os.path.join(index_dir, vector_service.INDEX_MANIFEST_FILE))
+
+    print(f"Edit: {result} | saved: {saved_after_edit} | after full re-encode: {saved_after_full}")
+    assert result["encoded"] == 1 and model.encoded[0] == "answer 20"
+    assert not saved_after_edit
+    assert saved_after_full
+
+
+if __name__ == "__main__":
+    test_quantized_scores_match_float32()
+    test_rebuild_from_quantized_store_is_not_persisted()
+    print("\n✅ Quantization tests passed")
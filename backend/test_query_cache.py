@@ -0,0 +1,29 @@
+import sys
+import os
+from unittest import mock
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.vector_service import VectorService
+from app.services.cache import LRUCache
+from fakes import FakeEmbedder
+
+
+def test_model_sees_original_text():
+    print("\n--- 🔤 Query cache keys vs encoded text ---")
+    model = FakeEmbedder(dim=8)
+    with mock.patch.object(VectorService, "_model", model), \
+            mock.patch.object(VectorService, "_batcher", None), \
+            mock.patch.object(VectorService, "_query_cache", LRUCache(16)):
+        first = VectorService._encode_queries(["Where is the  Cairo office?", "where is the cairo office?"])
+        VectorService._encode_queries(["WHERE is the Cairo office?", "Do you build iOS apps?"])
+
+    print(f"Encoded: {model.encoded}")
+    # One encode per normalized key, of the first original spelling (casing kept for cased models)
+    assert model.encoded == ["Where is the  Cairo office?", "Do you build iOS apps?"]
+    assert first.shape == (2, 8) and np.array_equal(first[0], first[1])
+
+
+if __name__ == "__main__":
+    test_model_sees_original_text()
+    print("\n✅ Query cache tests passed")
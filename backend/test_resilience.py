@@ -1,9 +1,10 @@
 import requests
+import os
 import uuid
 import time
 
 # Production URL
-API_URL = "https://rawanpo-zedny-ai.hf.space/api/chat/"
+API_URL = os.getenv("CHAT_API_URL", "https://rawanpo-zedny-ai.hf.space/api/chat/")
 
 def chat(session_id, message, persona_name):
     print(f"\n👤 [{persona_name}]: {message}")
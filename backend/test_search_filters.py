@@ -0,0 +1,64 @@
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
+
+from app.services.vector_service import KBIndex, doc_views
+
+CATEGORIES = ["support", "commercial", "web_services", "ai_solutions"]
+INTENTS = ["inquiry", "support", "complaint"]
+
+
+def synthetic_kb(n=200, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    docs = [{
+        "id": i,
+        "text": f"answer {i} about {CATEGORIES[i % 4]} invoice" if i % 3 else f"answer {i} about hosting",
+        "question_variant": f"question {i}",
+        "category": CATEGORIES[i % 4],
+        "subcategory": f"sub-{i % 7}",
+        "intent": INTENTS[i % 3],
+        "keywords": ["invoice"] if i % 5 == 0 else [],
+    } for i in range(n)]
+    n_rows = sum(len(doc_views(doc)) for doc in docs)
+    vectors = rng.standard_normal((n_rows, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return docs, vectors, rng
+
+
+def test_partition_scores_only_matching_docs():
+    print("\n--- 🗂️ Metadata-filtered partitions ---")
+    docs, vectors, rng = synthetic_kb()
+    index = KBIndex(docs, vectors, [str(i) for i in range(len(vectors))], "kb", ann_backend="ivf")
+
+    filters = {"category": {"support", "commercial"}, "intent": "inquiry"}
+    partition = index.partition(filters)
+    expected = [d for d in docs if d["category"] in filters["category"] and d["intent"] == "inquiry"]
+    print(f"Docs: {len(docs)} -> partition: {len(partition.docs)} docs / {len(partition.store)} rows")
+
+    assert [d["id"] for d in partition.docs] == [d["id"] for d in expected]
+    assert len(partition.store) == 2 * len(expected)
+    # The full index uses IVF, but a partition is built on the request path: exact scan, no k-means
+    assert index.ann.name == "ivf" and partition.ann.name == "exact"
+    # Cached per filter combination, whatever the value order
+    assert index.partition({"intent": ["inquiry"], "category": ["commercial", "support"]}) is partition
+
+    # Same semantic and lexical scores inside the partition as in the full index
+    query = rng.standard_normal(vectors.shape[1]).astype(np.float32)
+    positions = np.array([d["id"] for d in expected])
+    full = index.pool(index.store.scores(query[None, :]))[0]
+    assert np.allclose(partition.pool(partition.store.scores(query[None, :]))[0], full[positions], atol=1e-6)
+    lexical = index.lexical.scores(["invoice hosting"], normalize=True)[0]
+    assert np.allclose(partition.lexical.scores(["invoice hosting"], normalize=True)[0], lexical[positions])
+
+    # Unknown values match nothing; unknown fields are rejected
+    assert len(index.partition({"category": "does-not-exist"}).docs) == 0
+    try:
+        index.partition({"author": "me"})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_partition_scores_only_matching_docs()